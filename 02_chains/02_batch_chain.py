@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from itertools import islice
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+# Load environment variables
+load_dotenv()
+
+# 1. Command-line Options
+# Example:
+#   python 02_chains/02_batch_chain.py --input 02_chains/sample_topics.jsonl --output facts.jsonl
+# Each input line is a JSON object with the prompt variables, e.g. {"topic": "Mars"}.
+# Re-running the same command after a crash or Ctrl+C resumes where it stopped.
+parser = argparse.ArgumentParser(description="Run the simple chain over a JSONL file.")
+parser.add_argument("--input", required=True, help="JSONL file, one {\"topic\": ...} per line")
+parser.add_argument("--output", required=True, help="JSONL file to append results to (existing results are kept)")
+parser.add_argument("--checkpoint", help="progress file (default: <output>.ckpt)")
+parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+parser.add_argument("--batch-size", type=int, default=64, help="rows per abatch() call")
+args = parser.parse_args()
+checkpoint_path = args.checkpoint or f"{args.output}.ckpt"
+
+# 2. The Chain (same as 01_simple_chain.py)
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic},use Chinese")
+chain = prompt | model | StrOutputParser()
+
+
+# 3. Checkpointing
+# The checkpoint records how many input lines are done and how long the
+# output file was at that point. On resume the output is truncated back to
+# that length, so a batch that was half-written when we crashed is redone
+# cleanly instead of being duplicated. A fresh run (no checkpoint) starts at
+# the current end of the output, so earlier results are never cut off.
+def load_checkpoint() -> dict | None:
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(lines_done: int, output_bytes: int) -> None:
+    tmp = f"{checkpoint_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"lines_done": lines_done, "output_bytes": output_bytes}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, checkpoint_path)
+
+
+# 4. Batch Runner
+async def run_batches():
+    checkpoint = load_checkpoint()
+    output_size = os.path.getsize(args.output) if os.path.exists(args.output) else 0
+    if checkpoint is not None and output_size < checkpoint["output_bytes"]:
+        print("Output file is shorter than the checkpoint says; starting over")
+        checkpoint = None
+    if checkpoint is None:
+        if output_size:
+            print(f"Appending to existing {args.output} ({output_size} bytes)")
+        checkpoint = {"lines_done": 0, "output_bytes": output_size}
+    lines_done = checkpoint["lines_done"]
+    if lines_done:
+        print(f"Resuming after {lines_done} lines (checkpoint: {checkpoint_path})")
+
+    started = time.perf_counter()
+    processed = errors = 0
+
+    # Inputs are streamed: only one batch is held in memory at a time
+    with open(args.input, encoding="utf-8") as infile, open(args.output, "a+b") as outfile:
+        outfile.truncate(checkpoint["output_bytes"])
+        outfile.seek(checkpoint["output_bytes"])
+        lines = islice(infile, lines_done, None)
+
+        while True:
+            batch_lines = list(islice(lines, args.batch_size))
+            if not batch_lines:
+                break
+
+            rows, bad_lines = [], {}
+            for offset, line in enumerate(batch_lines):
+                line = line.strip()
+                rows.append(None)
+                if not line:
+                    continue
+                # Bad lines are recorded like failed calls, so a resume doesn't stop there again
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    bad_lines[offset] = f"{type(e).__name__}: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    bad_lines[offset] = f"expected a JSON object with the prompt variables, got {line[:80]}"
+                    continue
+                rows[-1] = row
+            inputs = [row for row in rows if row is not None]
+
+            # abatch runs the whole batch with at most `concurrency` calls in flight;
+            # return_exceptions keeps one bad row from failing the others
+            outputs = await chain.abatch(
+                inputs,
+                config={"max_concurrency": args.concurrency},
+                return_exceptions=True,
+            )
+            for output in outputs:
+                # Ctrl+C cancels the in-flight calls: stop before writing a partial batch
+                if isinstance(output, BaseException) and not isinstance(output, Exception):
+                    raise output
+            outputs = iter(outputs)
+
+            for offset, row in enumerate(rows):
+                record = {"line": lines_done + offset}
+                if offset in bad_lines:
+                    record["error"] = bad_lines[offset]
+                    errors += 1
+                elif row is None:
+                    continue  # blank line
+                else:
+                    output = next(outputs)
+                    record["input"] = row
+                    if isinstance(output, Exception):
+                        record["error"] = f"{type(output).__name__}: {output}"
+                        errors += 1
+                    else:
+                        record["output"] = output
+                outfile.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                processed += 1
+
+            outfile.flush()
+            os.fsync(outfile.fileno())
+            lines_done += len(batch_lines)
+            save_checkpoint(lines_done, outfile.tell())
+
+            elapsed = time.perf_counter() - started
+            print(f"  {lines_done} lines done | {processed / elapsed:6.2f} rows/s | {errors} errors")
+
+    elapsed = time.perf_counter() - started
+    return processed, errors, elapsed
+
+
+# 5. Run
+print(f"=== Batch Chain: {args.input} -> {args.output} ===")
+print(f"concurrency={args.concurrency}, batch size={args.batch_size}\n")
+
+try:
+    processed, errors, elapsed = asyncio.run(run_batches())
+except KeyboardInterrupt:
+    print("\nInterrupted. Run the same command again to resume.")
+else:
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"\nDone: {processed} rows in {elapsed:.1f}s ({rate:.2f} rows/s), {errors} errors")
+    print(f"Results: {args.output}")
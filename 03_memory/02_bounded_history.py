@@ -0,0 +1,215 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import tiktoken
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 3: Bounded Chat History with Rolling Summary ===\n")
+
+# 1. Setup Model
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = ChatOpenAI(model=model_name, base_url=base_url, temperature=0.7)
+
+# 2. Local Tokenizer
+# Token counts are measured locally with tiktoken, so trimming the history
+# never needs an extra API call. cl100k_base is close enough for budgeting
+# even when the served model uses a different tokenizer.
+encoding = tiktoken.get_encoding("cl100k_base")
+
+# Every chat message carries a few tokens of role/formatting overhead
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(message: BaseMessage) -> int:
+    return len(encoding.encode(str(message.content))) + MESSAGE_OVERHEAD_TOKENS
+
+
+# 3. Summarizer Chain
+# Older turns are folded into a running summary instead of being dropped.
+summary_prompt = ChatPromptTemplate.from_template(
+    """Progressively summarize the conversation below, adding to the previous summary.
+Keep names, facts and decisions the user may refer to later. Be brief.
+
+Previous summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+)
+summarizer = summary_prompt | model | StrOutputParser()
+
+# Summaries run here, off the request path
+summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+
+# 4. Bounded History
+class BoundedChatHistory(BaseChatMessageHistory):
+    """Chat history that only exposes the last `max_tokens` worth of messages.
+
+    The system prompt lives in the ChatPromptTemplate, so it is always sent.
+    The last `keep_last_exchanges` user/AI exchanges are pinned and always
+    kept, even if they alone exceed the budget. Messages that fall out of the
+    window are summarized in the background; until that summary is ready they
+    are simply left out, so a turn never waits for summarization.
+    """
+
+    def __init__(self, summarizer, max_tokens: int = 1000, keep_last_exchanges: int = 2):
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_last_exchanges = keep_last_exchanges
+        self.summary = ""
+        self._buffer: list[BaseMessage] = []
+        self._token_counts: list[int] = []
+        self._summary_tokens = 0
+        self._pending = None
+        self._generation = 0      # bumped by clear(); older summaries are discarded
+        self._lock = threading.Lock()
+
+    def _window_start(self) -> int:
+        """Index of the oldest buffered message that fits in the token window."""
+        pinned_start = max(0, len(self._buffer) - 2 * self.keep_last_exchanges)
+        budget = self.max_tokens - self._summary_tokens
+        start = len(self._buffer)
+        used = 0
+        while start > 0:
+            cost = self._token_counts[start - 1]
+            if start - 1 < pinned_start and used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        # Never open the window on an AI reply whose question was cut off
+        while start < pinned_start and not isinstance(self._buffer[start], HumanMessage):
+            start += 1
+        return start
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        with self._lock:
+            window = self._buffer[self._window_start():]
+            if self.summary:
+                window = [SystemMessage(content=f"Summary of the earlier conversation: {self.summary}")] + window
+            return window
+
+    def add_messages(self, messages) -> None:
+        with self._lock:
+            for message in messages:
+                self._buffer.append(message)
+                self._token_counts.append(count_tokens(message))
+            self._maybe_summarize()
+
+    def _maybe_summarize(self) -> None:
+        # Caller holds the lock. At most one summary per session is in flight.
+        evicted = self._window_start()
+        if evicted and self._pending is None:
+            self._pending = summary_executor.submit(
+                self._summarize, self.summary, self._buffer[:evicted], self._generation
+            )
+
+    def _summarize(self, previous_summary: str, evicted: list[BaseMessage], generation: int) -> None:
+        lines = "\n".join(f"{m.type}: {m.content}" for m in evicted)
+        try:
+            new_summary = self.summarizer.invoke({"summary": previous_summary or "(none)", "lines": lines})
+        except Exception as e:
+            # Keep serving the trimmed window; the next eviction retries
+            print(f"[summarizer] failed: {e}")
+            with self._lock:
+                if generation == self._generation:
+                    self._pending = None
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                return  # the history was cleared meanwhile; this summary is of the old one
+            # Only this task removes from the front and new messages are only
+            # appended, so the evicted messages are still the first len(evicted).
+            del self._buffer[:len(evicted)]
+            del self._token_counts[:len(evicted)]
+            self.summary = new_summary
+            self._summary_tokens = count_tokens(SystemMessage(content=new_summary))
+            self._pending = None
+            self._maybe_summarize()
+
+    def wait_for_summary(self) -> None:
+        """Block until any in-flight summarization finishes (useful in demos and tests)."""
+        pending = self._pending
+        while pending is not None:
+            pending.result()
+            pending = self._pending
+
+    def history_tokens(self) -> int:
+        return sum(count_tokens(m) for m in self.messages)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+            self._token_counts.clear()
+            self.summary = ""
+            self._summary_tokens = 0
+            # A summary still running belongs to the cleared conversation
+            self._generation += 1
+            self._pending = None
+
+
+# 5. Setup Prompt and Chain (same shape as 01_chat_history.py)
+prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant. Answer questions concisely."),
+    MessagesPlaceholder(variable_name="history"),
+    ("user", "{input}")
+])
+chain = prompt | model | StrOutputParser()
+
+# A small budget so the demo reaches the limit within a few turns
+MAX_HISTORY_TOKENS = int(os.getenv("MAX_HISTORY_TOKENS", "200"))
+
+store = {}
+
+def get_session_history(session_id: str):
+    if session_id not in store:
+        store[session_id] = BoundedChatHistory(summarizer, max_tokens=MAX_HISTORY_TOKENS)
+    return store[session_id]
+
+chain_with_history = RunnableWithMessageHistory(
+    chain,
+    get_session_history,
+    input_messages_key="input",
+    history_messages_key="history",
+)
+
+# 6. Long Conversation
+session_id = "user_123"
+print(f"--- Session: {session_id} (history budget: {MAX_HISTORY_TOKENS} tokens) ---")
+
+turns = [
+    "Hi, my name is Alice and I work as a marine biologist.",
+    "I'm planning a trip to Japan next spring. Any tips?",
+    "What food should I try in Osaka?",
+    "Recommend one book about the ocean.",
+    "What is my name and what do I do for work?",
+]
+
+for user_input in turns:
+    print(f"\n> User: {user_input}")
+    res = chain_with_history.invoke(
+        {"input": user_input},
+        config={"configurable": {"session_id": session_id}}
+    )
+    history = get_session_history(session_id)
+    print(f"AI: {res}")
+    print(f"   [history sent next turn: {history.history_tokens()} tokens]")
+
+history = get_session_history(session_id)
+history.wait_for_summary()
+print("\n--- Rolling Summary ---")
+print(history.summary or "(no turns summarized yet)")
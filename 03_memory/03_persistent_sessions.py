@@ -0,0 +1,231 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 3: Persistent, Sharded Session Store ===\n")
+
+# 1. Setup Model
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = ChatOpenAI(model=model_name, base_url=base_url, temperature=0.7)
+
+
+# 2. SQLite Shards
+# Sessions are spread over N SQLite files by a hash of the session_id.
+# Each file runs in WAL mode, so several worker processes can append to and
+# read from the same shard at once without blocking each other.
+# A per-session epoch is bumped on every clear(), so processes holding a
+# cached copy of that session notice the clear and reload from scratch.
+class SessionShard:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                message TEXT NOT NULL
+            )"""
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, seq)"
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                epoch INTEGER NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def append(self, session_id: str, messages) -> None:
+        rows = [(session_id, json.dumps(message_to_dict(m))) for m in messages]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)", rows
+            )
+            self.conn.commit()
+
+    def read_since(self, session_id: str, after_seq: int, epoch: int):
+        """Return (epoch, rows) from one consistent snapshot of the shard.
+
+        Rows are those after `after_seq`, or all of the session's rows if it
+        was cleared since `epoch` (the returned epoch then differs).
+        """
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                row = self.conn.execute(
+                    "SELECT epoch FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                current = row[0] if row else 0
+                rows = self.conn.execute(
+                    "SELECT seq, message FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq",
+                    (session_id, after_seq if current == epoch else 0),
+                ).fetchall()
+            finally:
+                self.conn.commit()
+            return current, rows
+
+    def delete(self, session_id: str) -> int:
+        """Delete a session's messages and bump its epoch; returns the new epoch."""
+        with self.lock:
+            self.conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self.conn.execute(
+                """INSERT INTO sessions (session_id, epoch) VALUES (?, 1)
+                   ON CONFLICT (session_id) DO UPDATE SET epoch = epoch + 1""",
+                (session_id,),
+            )
+            epoch = self.conn.execute(
+                "SELECT epoch FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            self.conn.commit()
+            return epoch
+
+
+# 3. Session History backed by a shard
+class SQLiteChatHistory(BaseChatMessageHistory):
+    """Append-only chat history for one session.
+
+    Messages are loaded lazily on first read. Later reads only fetch rows
+    newer than the last one seen, so messages appended by another worker
+    process show up without reloading the whole session. If another process
+    cleared the session, the epoch has moved and the copy is reloaded.
+    """
+
+    def __init__(self, session_id: str, shard: SessionShard):
+        self.session_id = session_id
+        self.shard = shard
+        self._messages = []
+        self._last_seq = 0
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        with self._lock:
+            epoch, rows = self.shard.read_since(self.session_id, self._last_seq, self._epoch)
+            if epoch != self._epoch:
+                # Cleared elsewhere: `rows` is the whole session as it is now
+                self._messages, self._last_seq, self._epoch = [], 0, epoch
+            if rows:
+                self._messages.extend(messages_from_dict([json.loads(m) for _, m in rows]))
+                self._last_seq = rows[-1][0]
+
+    @property
+    def messages(self):
+        self._refresh()
+        return list(self._messages)
+
+    def add_messages(self, messages) -> None:
+        # The write goes to disk first; the next read picks it up by seq
+        self.shard.append(self.session_id, messages)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch = self.shard.delete(self.session_id)
+            self._messages = []
+            self._last_seq = 0
+
+
+# 4. Store with a bounded LRU of hot sessions
+class ShardedSessionStore:
+    """Keeps at most `max_hot_sessions` histories in memory.
+
+    Evicted sessions are not lost: their messages stay on disk and are
+    lazy-loaded again the next time the session is used.
+    """
+
+    def __init__(self, directory: str, num_shards: int = 4, max_hot_sessions: int = 128):
+        os.makedirs(directory, exist_ok=True)
+        self.shards = [
+            SessionShard(os.path.join(directory, f"sessions-{i:02d}.db"))
+            for i in range(num_shards)
+        ]
+        self.max_hot_sessions = max_hot_sessions
+        self._hot = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shard_for(self, session_id: str) -> SessionShard:
+        # A stable hash (not hash()) so every process picks the same shard
+        digest = hashlib.md5(session_id.encode("utf-8")).digest()
+        return self.shards[int.from_bytes(digest[:4], "big") % len(self.shards)]
+
+    def get_session_history(self, session_id: str) -> SQLiteChatHistory:
+        with self._lock:
+            history = self._hot.get(session_id)
+            if history is not None:
+                self._hot.move_to_end(session_id)
+                return history
+            history = SQLiteChatHistory(session_id, self.shard_for(session_id))
+            self._hot[session_id] = history
+            if len(self._hot) > self.max_hot_sessions:
+                self._hot.popitem(last=False)
+            return history
+
+    def hot_sessions(self) -> int:
+        return len(self._hot)
+
+
+# 5. Setup Prompt and Chain (same as 01_chat_history.py)
+prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant. Answer questions concisely."),
+    MessagesPlaceholder(variable_name="history"),
+    ("user", "{input}")
+])
+chain = prompt | model | StrOutputParser()
+
+# Replaces the plain `store = {}` dict: bounded in memory, persistent on disk
+session_store = ShardedSessionStore(
+    os.getenv("SESSION_STORE_DIR", ".sessions"),
+    num_shards=int(os.getenv("SESSION_STORE_SHARDS", "4")),
+    max_hot_sessions=int(os.getenv("SESSION_STORE_HOT_SESSIONS", "128")),
+)
+
+chain_with_history = RunnableWithMessageHistory(
+    chain,
+    session_store.get_session_history,
+    input_messages_key="input",
+    history_messages_key="history",
+)
+
+# 6. Interactions
+session_id = "user_123"
+print(f"--- Session: {session_id} ---")
+
+history = session_store.get_session_history(session_id)
+print(f"Messages already on disk for this session: {len(history.messages)}")
+print("(Run this script twice: the second run remembers the first.)")
+
+print("\n> User: My name is Alice.")
+res1 = chain_with_history.invoke(
+    {"input": "Hi, my name is Alice."},
+    config={"configurable": {"session_id": session_id}}
+)
+print(f"AI: {res1}")
+
+print("\n> User: What is my name?")
+res2 = chain_with_history.invoke(
+    {"input": "What is my name?"},
+    config={"configurable": {"session_id": session_id}}
+)
+print(f"AI: {res2}")
+
+print("\n--- Store ---")
+print(f"Shard for {session_id}: {os.path.basename(session_store.shard_for(session_id).path)}")
+print(f"Hot sessions in memory: {session_store.hot_sessions()} (max {session_store.max_hot_sessions})")
@@ -0,0 +1,208 @@
+import os
+import re
+import uuid
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+import tiktoken
+from langchain_openai import ChatOpenAI
+# These are the helpers ChatOpenAI itself uses to build each message dict
+# (private, checked against langchain-openai 1.x; see requirements.txt).
+# Without them the model below falls back to the stock, uncached path.
+try:
+    from langchain_openai.chat_models.base import (
+        _convert_from_v1_to_chat_completions,
+        _convert_message_to_dict,
+    )
+except ImportError:
+    _convert_message_to_dict = None
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 3: Incremental Prompt Assembly ===\n")
+
+# Every chat message carries a few tokens of role/formatting overhead
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# 1. Message-level Cache
+# History messages never change once stored, so their wire format (the dict
+# sent to the API) and their token count only need computing once. The cache
+# is keyed by role mode, message id and a fingerprint of the content, so two
+# sessions that reuse an id, or models with different role rules, never share
+# an entry. It is bounded so it cannot grow forever.
+class MessageCache:
+    def __init__(self, max_entries: int = 10_000, encoding_name: str = "cl100k_base"):
+        self.max_entries = max_entries
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(message: BaseMessage) -> int:
+        # str hashes are memoized on the string object, so re-hashing a stored
+        # message's content every turn is O(1) after the first time
+        tool_calls = getattr(message, "tool_calls", None)
+        return hash((message.type, str(message.content), message.name,
+                     repr(tool_calls) if tool_calls else None))
+
+    def _compute(self, message: BaseMessage, role_mode: str):
+        if _convert_message_to_dict is None:
+            wire = None               # token counts are still cached
+        else:
+            if isinstance(message, AIMessage):
+                wire = _convert_message_to_dict(_convert_from_v1_to_chat_completions(message))
+            else:
+                wire = _convert_message_to_dict(message)
+            # The per-message step ChatOpenAI applies after building the list:
+            # o-series models take "developer" instead of "system"
+            if role_mode == "developer" and wire["role"] == "system":
+                wire["role"] = "developer"
+        tokens = len(self.encoding.encode(str(message.content))) + MESSAGE_OVERHEAD_TOKENS
+        return wire, tokens
+
+    def get(self, message: BaseMessage, role_mode: str = "system"):
+        """Return (wire dict, token count) for a message, computing it at most once per key."""
+        if message.id is None:
+            # Fresh messages (the system prompt, the new user turn) are not cached
+            return self._compute(message, role_mode)
+        key = (role_mode, message.id, self._fingerprint(message))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._compute(message, role_mode)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+message_cache = MessageCache()
+
+
+# 2. Model that serializes through the cache
+class MemoizedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that reuses each history message's serialized form.
+
+    The stock client converts every message to a dict on every call, so a
+    turn costs O(history). Here only messages without a cached entry are
+    converted. Message order is left untouched, so the request prefix stays
+    byte-identical between turns and provider-side prefix caching can hit.
+    """
+
+    def _get_request_payload(self, input_, *, stop=None, **kwargs) -> dict:
+        if _convert_message_to_dict is None:
+            return super()._get_request_payload(input_, stop=stop, **kwargs)
+        messages = self._convert_input(input_).to_messages()
+        payload = super()._get_request_payload([], stop=stop, **kwargs)
+        if "messages" not in payload:
+            # Responses API payloads have a different shape; use the stock path
+            return super()._get_request_payload(input_, stop=stop, **kwargs)
+        role_mode = "developer" if self.model_name and re.match(r"^o\d", self.model_name) else "system"
+        # Copies, so no later change to the payload can reach the cached dicts
+        payload["messages"] = [dict(message_cache.get(m, role_mode)[0]) for m in messages]
+        return payload
+
+
+# 3. Append-only History with a running token total
+class MemoizedChatHistory(BaseChatMessageHistory):
+    """History that stamps each message with a stable id and keeps a running token count.
+
+    Messages are only ever appended, so earlier turns keep their position and
+    their cache entries; each turn only tokenizes and serializes what is new.
+    """
+
+    def __init__(self):
+        self._messages: list[BaseMessage] = []
+        self.total_tokens = 0
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        return self._messages
+
+    def add_messages(self, messages) -> None:
+        for message in messages:
+            if message.id is None:
+                message = message.model_copy(update={"id": str(uuid.uuid4())})
+            self._messages.append(message)
+            self.total_tokens += message_cache.get(message)[1]
+
+    def clear(self) -> None:
+        self._messages = []
+        self.total_tokens = 0
+
+
+# 4. Setup Model, Prompt and Chain (same shape as 01_chat_history.py)
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = MemoizedChatOpenAI(model=model_name, base_url=base_url, temperature=0.7)
+
+# The system prompt is a constant string, so it renders identically every turn
+prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant. Answer questions concisely."),
+    MessagesPlaceholder(variable_name="history"),
+    ("user", "{input}")
+])
+chain = prompt | model | StrOutputParser()
+
+store = {}
+
+def get_session_history(session_id: str):
+    if session_id not in store:
+        store[session_id] = MemoizedChatHistory()
+    return store[session_id]
+
+chain_with_history = RunnableWithMessageHistory(
+    chain,
+    get_session_history,
+    input_messages_key="input",
+    history_messages_key="history",
+)
+
+# 5. Conversation
+session_id = "user_123"
+print(f"--- Session: {session_id} ---")
+
+turns = [
+    "Hi, my name is Alice.",
+    "I like hiking and photography.",
+    "Suggest a weekend plan for me.",
+    "What is my name?",
+]
+
+for user_input in turns:
+    hits_before, misses_before = message_cache.hits, message_cache.misses
+    print(f"\n> User: {user_input}")
+    res = chain_with_history.invoke(
+        {"input": user_input},
+        config={"configurable": {"session_id": session_id}}
+    )
+    history = get_session_history(session_id)
+    print(f"AI: {res}")
+    print(
+        f"   [cache: {message_cache.hits - hits_before} reused, "
+        f"{message_cache.misses - misses_before} new | "
+        f"history: {len(history.messages)} messages, {history.total_tokens} tokens]"
+    )
+
+print("\n" + "=" * 60)
+print("Why this helps")
+print("=" * 60)
+print("""
+• Each turn only serializes and tokenizes the new messages
+• Older messages keep their position, so the prompt prefix is stable
+• A stable prefix lets provider-side prompt caching reuse earlier work
+""")
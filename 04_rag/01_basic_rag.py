@@ -3,10 +3,12 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
+from reranking import RerankingRetriever
+from vector_index import from_documents
+from dedup import MinHashDeduplicator
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +32,10 @@ text_splitter = RecursiveCharacterTextSplitter(
 splits = text_splitter.split_documents(documents)
 print(f"Split into {len(splits)} chunks")
 
+# Drop near-duplicate chunks before paying to embed them (see 06_dedup.py)
+splits = MinHashDeduplicator(threshold=0.8).transform_documents(splits)
+print(f"{len(splits)} unique chunks")
+
 print("\n=== Step 3: Create Embeddings & Vector Store ===")
 # Embeddings convert text into numerical vectors
 # Similar texts will have similar vectors
@@ -37,11 +43,15 @@ base_url = os.getenv("OPENAI_BASE_URL")
 embeddings = OpenAIEmbeddings(base_url=base_url)
 
 # FAISS is a fast vector database (runs locally, no server needed)
-vectorstore = FAISS.from_documents(splits, embeddings)
-print("Vector store created successfully")
+# from_documents picks an exact index for small corpora and HNSW / IVF for
+# large ones (see vector_index.py)
+vectorstore = from_documents(splits, embeddings)
+print(f"Vector store created successfully ({vectorstore.index_report['kind']} index)")
 
 # Create a retriever (this will search for relevant chunks)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 2})  # Return top 2 results
+# It fetches up to 50 candidates and keeps the 2 that are relevant but not
+# near-copies of each other (see 03_reranking.py)
+retriever = RerankingRetriever(vectorstore=vectorstore, k=2, fetch_k=50)  # Return top 2 results
 
 print("\n=== Step 4: Create RAG Chain ===")
 # Setup the model
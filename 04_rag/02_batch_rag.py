@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from vector_index import from_documents, search_params, search_vectors
+from dedup import MinHashDeduplicator
+
+# Load environment variables
+load_dotenv()
+
+# Batch question answering over the same index as 01_basic_rag.py.
+# Instead of one rag_chain.invoke() per question (one embedding call and one
+# single-vector search each), questions are handled a batch at a time:
+#   - all questions in the batch are embedded with one batched request
+#   - FAISS searches the whole batch in a single multi-vector call, with the
+#     same nprobe / efSearch knobs as the retrievers (see vector_index.py)
+#   - chunks shared by several questions are formatted into context once
+#   - answers are generated concurrently and written as soon as they finish
+#
+# Example:
+#   python 04_rag/02_batch_rag.py --questions questions.txt --output answers.jsonl
+# The questions file holds one question per line (plain text or {"question": ...}).
+parser = argparse.ArgumentParser(description="Answer many questions against the RAG index.")
+parser.add_argument("--questions", help="file with one question per line (default: built-in examples)")
+parser.add_argument("--output", help="JSONL file for the answers (default: print them)")
+parser.add_argument("--batch-size", type=int, default=256, help="questions per embedding/search batch")
+parser.add_argument("--concurrency", type=int, default=16, help="answers generated at once")
+parser.add_argument("-k", type=int, default=2, help="chunks retrieved per question")
+parser.add_argument("--nprobe", type=int, help="IVF clusters scanned per question (default: tuned)")
+parser.add_argument("--ef-search", type=int, help="HNSW nodes visited per question (default: tuned)")
+args = parser.parse_args()
+
+print("=== Step 1: Load, Split & Index Documents ===")
+loader = TextLoader("04_rag/sample_docs.txt", encoding="utf-8")
+documents = loader.load()
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+splits = MinHashDeduplicator(threshold=0.8).transform_documents(text_splitter.split_documents(documents))
+
+base_url = os.getenv("OPENAI_BASE_URL")
+embeddings = OpenAIEmbeddings(base_url=base_url)
+vectorstore = from_documents(splits, embeddings)
+print(f"Indexed {len(splits)} chunks ({vectorstore.index_report['kind']} index)")
+
+print("\n=== Step 2: Create the Answer Chain ===")
+# Retrieval happens outside the chain, so the chain only sees ready-made context
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
+
+template = """Answer the question based only on the following context:
+
+{context}
+
+Question: {question}
+
+Answer:"""
+
+prompt = ChatPromptTemplate.from_template(template)
+answer_chain = prompt | model | StrOutputParser()
+
+
+def read_questions(path):
+    """Yield questions one at a time, so huge question files are never fully loaded.
+
+    A line that cannot be read as a question is yielded as a ValueError, so
+    it becomes an error row instead of stopping the run.
+    """
+    if path is None:
+        yield from [
+            "What is LCEL?",
+            "When was LangChain released?",
+            "What are the use cases for LangChain?",
+        ]
+        return
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("{"):
+                yield line
+                continue
+            try:
+                question = json.loads(line)["question"]
+            except json.JSONDecodeError as e:
+                yield ValueError(f"line {number}: invalid JSON ({e})")
+            except KeyError:
+                yield ValueError(f"line {number}: no \"question\" key")
+            else:
+                yield question if isinstance(question, str) else ValueError(f"line {number}: question is not a string")
+
+
+def batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# 3. Vectorized Retrieval
+# Context strings are cached by the exact set of chunk ids, so questions that
+# retrieve the same chunks share one formatted context string.
+context_cache = {}
+
+
+async def retrieve_batch(questions):
+    unique = list(dict.fromkeys(questions))          # repeated questions are embedded once
+    # One request for the whole batch. OpenAIEmbeddings embeds queries and
+    # documents the same way, so this matches what a retriever would do.
+    vectors = await embeddings.aembed_documents(unique)
+
+    # One FAISS call for the whole batch: (n_questions, k) ids
+    params = search_params(vectorstore.index, args.nprobe, args.ef_search)
+    _, indices = search_vectors(vectorstore, np.asarray(vectors, dtype=np.float32), args.k, params)
+
+    by_question = {}
+    for question, row in zip(unique, indices):
+        ids = tuple(int(i) for i in row if i != -1)
+        if ids not in context_cache:
+            docs = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]) for i in ids]
+            context_cache[ids] = "\n\n".join(doc.page_content for doc in docs)
+        by_question[question] = context_cache[ids]
+    return [by_question[q] for q in questions]
+
+
+# 4. Concurrent Generation
+async def answer(number, question, context, limit):
+    async with limit:
+        record = {"n": number, "question": question}
+        try:
+            record["answer"] = await answer_chain.ainvoke({"context": context, "question": question})
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+
+async def run(out):
+    limit = asyncio.Semaphore(args.concurrency)
+    pending = set()
+    stats = {"answered": 0, "errors": 0}
+
+    def write(tasks):
+        for task in tasks:
+            record = task.result()
+            stats["answered"] += 1
+            stats["errors"] += "error" in record
+            if out is sys.stdout:
+                print(f"\n📝 Question: {record['question']}")
+                print(f"🤖 Answer: {record.get('answer', record.get('error'))}")
+            else:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    number = 0
+    for batch in batches(read_questions(args.questions), args.batch_size):
+        # Retrieval for this batch overlaps with generation for earlier ones
+        questions = [q for q in batch if not isinstance(q, ValueError)]
+        contexts = iter(await retrieve_batch(questions) if questions else [])
+        for question in batch:
+            if isinstance(question, ValueError):
+                bad = asyncio.get_running_loop().create_future()
+                bad.set_result({"n": number, "question": None, "error": str(question)})
+                pending.add(bad)
+            else:
+                pending.add(asyncio.create_task(answer(number, question, next(contexts), limit)))
+            number += 1
+
+        # Backpressure: keep at most a few batches' worth of answers in flight
+        while len(pending) > 2 * args.batch_size:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            write(done)
+        done = {task for task in pending if task.done()}
+        pending -= done
+        write(done)
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        write(done)
+    return stats
+
+
+print("\n=== Step 3: Answer Questions in Batches ===")
+print(f"batch size={args.batch_size}, concurrency={args.concurrency}, k={args.k}")
+started = time.perf_counter()
+out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+try:
+    stats = asyncio.run(run(out))
+finally:
+    if out is not sys.stdout:
+        out.close()
+
+elapsed = time.perf_counter() - started
+print(f"\nAnswered {stats['answered']} questions in {elapsed:.1f}s "
+      f"({stats['answered'] / elapsed:.1f}/s), {stats['errors']} errors")
+print(f"Distinct contexts built: {len(context_cache)}")
+if args.output:
+    print(f"Results: {args.output} (in completion order; 'n' is the input position)")
@@ -0,0 +1,68 @@
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from reranking import RerankingRetriever
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 4: Reranking Retrieved Chunks ===\n")
+print("Top-k similarity happily returns two chunks that say the same thing.")
+print("Fetch more candidates, then rerank them for relevance AND diversity.\n")
+
+print("=== Step 1: Build the Vector Store ===")
+loader = TextLoader("04_rag/sample_docs.txt", encoding="utf-8")
+documents = loader.load()
+# Small chunks with a large overlap, to make near-duplicates easy to see
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=100)
+splits = text_splitter.split_documents(documents)
+
+base_url = os.getenv("OPENAI_BASE_URL")
+embeddings = OpenAIEmbeddings(base_url=base_url)
+vectorstore = FAISS.from_documents(splits, embeddings)
+print(f"Indexed {len(splits)} chunks")
+
+print("\n=== Step 2: Compare Retrievers ===")
+question = "What is LCEL?"
+plain = vectorstore.as_retriever(search_kwargs={"k": 2})
+reranked = RerankingRetriever(vectorstore=vectorstore, k=2, fetch_k=50, lambda_mult=0.5, max_drop=0.3)
+
+
+def show(name, docs):
+    print(f"\n{name}:")
+    for doc in docs:
+        print(f"  - {doc.page_content[:90].replace(chr(10), ' ')}...")
+
+
+print(f"Question: {question}")
+show("Plain top-2", plain.invoke(question))
+show("Over-fetch + MMR top-2", reranked.invoke(question))
+
+print("\n=== Step 3: Rerank Cost ===")
+# The rerank step only touches vectors that are already in memory.
+# Measure it alone on synthetic data the size of a real over-fetch.
+rng = np.random.default_rng(0)
+n, dim, k = 200, 1536, 4
+query = rng.standard_normal(dim).astype(np.float32)
+candidates = rng.standard_normal((n, dim)).astype(np.float32)
+docs = [Document(page_content=f"chunk {i}") for i in range(n)]
+bench = RerankingRetriever(vectorstore=None, k=k, max_drop=0.5)
+
+runs = 200
+start = time.perf_counter()
+for _ in range(runs):
+    bench.rerank("query", query, docs, candidates)
+per_call = (time.perf_counter() - start) / runs
+print(f"MMR + score cutoff over N={n} candidates (d={dim}, k={k}): {per_call * 1e6:.0f} µs per query")
+
+print("\nKnobs:")
+print("  fetch_k     candidates pulled from FAISS (more = better diversity, same network cost)")
+print("  lambda_mult 1.0 = pure relevance, 0.0 = pure diversity")
+print("  min_score / max_drop  drop weak matches before MMR")
+print("  cross_encoder=CrossEncoderReranker()  optional local reorder (pip install sentence-transformers)")
@@ -0,0 +1,100 @@
+import os
+import time
+import argparse
+import threading
+import numpy as np
+import faiss
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough
+from sharded_search import ShardedVectorStore
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 4: Sharded Vector Search ===\n")
+print("One FAISS index in one process shares the GIL with the chain code.")
+print("Split it across worker processes, one shard and one core each.\n")
+
+parser = argparse.ArgumentParser(description="RAG over a sharded index, plus a throughput comparison.")
+parser.add_argument("--shards", type=int, default=4)
+parser.add_argument("--vectors", type=int, default=200_000, help="synthetic corpus size for the benchmark")
+parser.add_argument("--dim", type=int, default=128)
+parser.add_argument("--clients", type=int, default=8, help="threads querying at once")
+parser.add_argument("--queries", type=int, default=400)
+args = parser.parse_args()
+
+print("=== Step 1: A Sharded Retriever in the RAG Chain ===")
+loader = TextLoader("04_rag/sample_docs.txt", encoding="utf-8")
+splits = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=20).split_documents(loader.load())
+
+base_url = os.getenv("OPENAI_BASE_URL")
+embeddings = OpenAIEmbeddings(base_url=base_url)
+store = ShardedVectorStore.from_documents(splits, embeddings, n_shards=2)
+print(f"{len(splits)} chunks in 2 worker processes")
+
+model = ChatOpenAI(model=os.getenv("OPENAI_MODEL_NAME"), base_url=base_url, temperature=0)
+prompt = ChatPromptTemplate.from_template("""Answer the question based only on the following context:
+
+{context}
+
+Question: {question}
+
+Answer:""")
+
+
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+# The sharded retriever is a drop-in for vectorstore.as_retriever()
+rag_chain = (
+    {"context": store.as_retriever(k=2) | format_docs, "question": RunnablePassthrough()}
+    | prompt
+    | model
+    | StrOutputParser()
+)
+question = "What is LCEL?"
+print(f"\n📝 Question: {question}")
+print(f"🤖 Answer: {rag_chain.invoke(question)}")
+store.close()
+
+print(f"\n=== Step 2: Throughput, {args.vectors:,} x {args.dim} synthetic vectors ===")
+rng = np.random.default_rng(0)
+vectors = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+placeholder_docs = [Document(page_content="")] * args.vectors   # only ids matter here
+
+
+def run_clients(search) -> float:
+    """Queries per second with `clients` threads issuing one query at a time."""
+    chunks = np.array_split(np.arange(args.queries), args.clients)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda ids=ids: [search(queries[i:i + 1]) for i in ids]) for ids in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return args.queries / (time.perf_counter() - start)
+
+
+# Baseline: one exact index in this process
+single = faiss.IndexFlatL2(args.dim)
+single.add(vectors)
+single_qps = run_clients(lambda q: single.search(q, 10))
+_, expected = single.search(queries, 10)
+
+# Exact shards too (target_recall=1.0), so the merged results can be checked
+with ShardedVectorStore.from_vectors(vectors, placeholder_docs, n_shards=args.shards, target_recall=1.0) as sharded:
+    sharded_qps = run_clients(lambda q: sharded.search(q, 10))
+    _, merged = sharded.search(queries, 10)
+
+print(f"single process: {single_qps:8.0f} queries/s")
+print(f"{args.shards} shards:       {sharded_qps:8.0f} queries/s  (CPU cores here: {os.cpu_count()})")
+print(f"merged top-10 identical to single-index top-10: {np.array_equal(merged, expected)}")
+print("\nShards scale with cores: on a single core the socket round trip is pure overhead.")
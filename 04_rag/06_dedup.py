@@ -0,0 +1,61 @@
+import os
+import time
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from dedup import MinHashDeduplicator
+from vector_index import from_documents
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 4: Near-Duplicate Chunk Removal ===\n")
+print("Real document dumps repeat themselves: copies, revisions, boilerplate.")
+print("Every repeated chunk costs an embedding call and crowds out other results.\n")
+
+print("=== Step 1: A Repetitive Corpus ===")
+# Stand-in for a document dump: the sample document, two lightly edited
+# revisions of it, and the same footer pasted under every file
+with open("04_rag/sample_docs.txt", encoding="utf-8") as f:
+    original = f.read()
+footer = ("\n\nThis document is provided for internal training purposes only. "
+          "Do not distribute outside the team. Contact the documentation group for the latest version.")
+documents = [
+    Document(page_content=original + footer, metadata={"source": "langchain_intro.txt"}),
+    Document(page_content=original.replace("October 2022", "October, 2022") + footer,
+             metadata={"source": "langchain_intro_v2.txt"}),
+    Document(page_content=original.replace("LangChain", "LangChain (LC)", 1) + footer,
+             metadata={"source": "langchain_intro_final.txt"}),
+    Document(page_content="Release notes: LCEL is now the recommended way to build chains." + footer,
+             metadata={"source": "release_notes.txt"}),
+]
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+splits = text_splitter.split_documents(documents)
+print(f"{len(documents)} files -> {len(splits)} chunks")
+
+print("\n=== Step 2: Deduplicate Between Splitting and Embedding ===")
+dedup = MinHashDeduplicator(threshold=0.8)
+start = time.perf_counter()
+unique_splits = dedup.transform_documents(splits)
+elapsed = time.perf_counter() - start
+
+report = dedup.last_report
+print(f"Chunks: {report['chunks_in']} -> {report['chunks_out']} "
+      f"({report['duplicates_removed']} near-duplicates removed in {elapsed * 1000:.1f}ms)")
+print(f"Text to embed: {report['bytes_saved']:,} bytes smaller ({report['bytes_saved_pct']}%)")
+print(f"Embedding inputs saved: {report['embedding_inputs_saved']}")
+print(f"(LSH: {dedup.bands} bands x {dedup.rows} rows over {dedup.num_perm} MinHash values)")
+
+print("\nEach kept chunk remembers where its duplicates came from:")
+for doc in unique_splits:
+    if "duplicates" in doc.metadata:
+        sources = [d["source"] for d in doc.metadata["duplicates"]]
+        print(f"  {doc.metadata['source']:<28} also in {sources}")
+        print(f"    \"{doc.page_content[:70].replace(chr(10), ' ')}...\"")
+        break
+
+print("\n=== Step 3: Index Only the Unique Chunks ===")
+embeddings = OpenAIEmbeddings(base_url=os.getenv("OPENAI_BASE_URL"))
+vectorstore = from_documents(unique_splits, embeddings)
+print(f"Indexed {vectorstore.index.ntotal} chunks instead of {len(splits)}")
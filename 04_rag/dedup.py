@@ -0,0 +1,165 @@
+"""Near-duplicate chunk removal with MinHash + LSH, before anything is embedded.
+
+Import from a script in this folder, e.g. `from dedup import MinHashDeduplicator`.
+
+    splits = text_splitter.split_documents(documents)
+    dedup = MinHashDeduplicator(threshold=0.8)
+    splits = dedup.transform_documents(splits)
+    print(dedup.last_report)
+    vectorstore = from_documents(splits, embeddings)
+
+Each chunk becomes a set of word 5-grams ("shingles"). A MinHash signature
+of 128 numbers estimates the Jaccard similarity of two such sets. LSH groups
+signatures into bands, and only chunks that share a band bucket are
+compared, so the cost stays close to linear rather than all-pairs.
+Candidates are confirmed with their exact Jaccard similarity.
+
+Each group of near-duplicates keeps its first chunk. That chunk's metadata
+gets a "duplicates" list with the metadata (source, ...) of every chunk
+merged into it, so no source is lost.
+"""
+import zlib
+from typing import Optional, Sequence
+import numpy as np
+from langchain_core.documents import BaseDocumentTransformer, Document
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """Hashed word n-grams of a text, as unique uint64 values.
+
+    Words are hashed once; each n-gram hash is then combined from its words'
+    hashes with array arithmetic instead of building n-gram strings.
+    """
+    words = text.lower().split() or [""]
+    hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    size = min(size, len(hashes))
+    grams = np.zeros(len(hashes) - size + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(size):
+            grams = grams * np.uint64(1_000_003) + hashes[offset : offset + len(grams)]
+    return np.unique(grams)
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.99) -> tuple[int, int]:
+    """(bands, rows) with the most rows per band that still finds pairs at the threshold.
+
+    A pair with similarity s shares at least one bucket with probability
+    1 - (1 - s^rows)^bands. Every candidate is verified exactly afterwards,
+    so missed pairs matter more than extra candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class MinHashDeduplicator(BaseDocumentTransformer):
+    """Collapses near-duplicate documents into one canonical document each."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5,
+                 embedding_batch_size: int = 1000, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.embedding_batch_size = embedding_batch_size   # OpenAIEmbeddings' chunk_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: (a * x + b) mod 2^64, keeping the top 32 bits
+        self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self.last_report: Optional[dict] = None
+
+    def signature(self, hashed_shingles: np.ndarray) -> np.ndarray:
+        """MinHash signature: for each hash function, the smallest hash of any shingle."""
+        return self.signatures([hashed_shingles])[0]
+
+    def signatures(self, shingle_sets: Sequence[np.ndarray], block: int = 1 << 15) -> np.ndarray:
+        """Signatures of many shingle sets, computed a block of shingles at a time."""
+        result = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(shingle_sets):
+            stop, total = start, 0
+            while stop < len(shingle_sets) and (stop == start or total + len(shingle_sets[stop]) <= block):
+                total += len(shingle_sets[stop])
+                stop += 1
+            group = shingle_sets[start:stop]
+            offsets = np.cumsum([0] + [len(s) for s in group[:-1]])
+            with np.errstate(over="ignore"):
+                hashed = ((np.concatenate(group)[:, None] * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+            result[start:stop] = np.minimum.reduceat(hashed, offsets, axis=0)
+            start = stop
+        return result
+
+    def find_duplicates(self, texts: Sequence[str]) -> np.ndarray:
+        """For each text, the index of the canonical text of its group (itself if unique)."""
+        sets = [shingles(t, self.shingle_size) for t in texts]
+        signatures = self.signatures(sets)
+        parent = np.arange(len(texts))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def similar(i: int, j: int) -> bool:
+            shared = len(np.intersect1d(sets[i], sets[j], assume_unique=True))
+            return shared / (len(sets[i]) + len(sets[j]) - shared) >= self.threshold
+
+        for band in range(self.bands):
+            # One 64-bit key per chunk and band; sorting groups equal keys into buckets
+            with np.errstate(over="ignore"):
+                keys = (signatures[:, band * self.rows : (band + 1) * self.rows] * self._band_mix).sum(axis=1)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, len(keys)])
+            shared_bucket = sizes > 1
+            for start, size in zip(starts[shared_bucket], sizes[shared_bucket]):
+                members = order[start : start + size]
+                # Join each member to the first earlier member it really is close to
+                for position, j in enumerate(members[1:], start=1):
+                    for i in members[:position]:
+                        a, b = root(i), root(j)
+                        if a == b:
+                            break
+                        if similar(i, j):
+                            parent[max(a, b)] = min(a, b)    # the earliest chunk stays canonical
+                            break
+        return np.array([root(i) for i in range(len(texts))], dtype=np.int64)
+
+    def transform_documents(self, documents: Sequence[Document], **kwargs) -> list[Document]:
+        documents = list(documents)
+        canonical = self.find_duplicates([d.page_content for d in documents])
+
+        kept, merged = {}, {}
+        for i, doc in enumerate(documents):
+            if canonical[i] == i:
+                kept[i] = doc
+            else:
+                merged.setdefault(int(canonical[i]), []).append(doc.metadata)
+        result = []
+        for i, doc in kept.items():
+            if i in merged:
+                doc = Document(page_content=doc.page_content, id=doc.id,
+                               metadata={**doc.metadata, "duplicates": merged[i]})
+            result.append(doc)
+
+        bytes_in = sum(len(d.page_content.encode("utf-8")) for d in documents)
+        bytes_out = sum(len(d.page_content.encode("utf-8")) for d in result)
+        batches = lambda n: -(-n // self.embedding_batch_size)
+        self.last_report = {
+            "chunks_in": len(documents),
+            "chunks_out": len(result),
+            "duplicates_removed": len(documents) - len(result),
+            "bytes_saved": bytes_in - bytes_out,
+            "bytes_saved_pct": round(100 * (bytes_in - bytes_out) / bytes_in, 1) if bytes_in else 0.0,
+            "embedding_inputs_saved": len(documents) - len(result),
+            "embedding_requests_saved": batches(len(documents)) - batches(len(result)),
+        }
+        return result
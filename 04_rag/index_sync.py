@@ -0,0 +1,443 @@
+"""Keep a FAISS index in sync with a directory of documents, incrementally.
+
+Import from a script in this folder, e.g. `from index_sync import IndexSyncer, LiveIndex`.
+
+Writer (one process, e.g. a cron job or `04_index_sync.py --watch docs/`):
+
+    syncer = IndexSyncer("docs/", ".rag_index", embeddings)
+    syncer.watch(interval=5)           # or syncer.sync() once
+
+Readers (any number of serving processes):
+
+    live = LiveIndex(".rag_index", embeddings).start()
+    retriever = live.as_retriever(lambda vs: vs.as_retriever(search_kwargs={"k": 2}))
+
+How it stays cheap:
+- Files are re-read only when their size or mtime changed, and re-chunked
+  only when their content hash changed.
+- Chunk ids are a hash of (file, chunk text), so an edited file keeps the
+  ids, and the embeddings, of every chunk that did not change. Only new
+  chunks are embedded; removed chunks are deleted from the index by id.
+- Each sync publishes a new snapshot directory and then atomically replaces
+  the CURRENT pointer file. Readers load the new snapshot in the background
+  and swap a single reference, so queries never wait for a reload.
+
+The writer keeps a flat index, which supports deletes by id. For large
+corpora it also keeps an IVF index (see vector_index.py) next to it: IVF is
+the FAISS index that supports remove_ids, so each sync adds and removes just
+the changed vectors. It is only retrained and re-tuned when the corpus has
+grown or shrunk a lot, or when rebuild_ann() is called on its own schedule.
+
+Files that cannot be read (not UTF-8, or gone mid-scan) are skipped and
+listed in the report; the rest of the pass goes ahead.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Optional
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from vector_index import choose_index, empty_index, train, tune
+
+POINTER = "CURRENT"
+SNAPSHOTS = "snapshots"
+ANN_META = "ann.json"            # ANN label -> docstore id, next to ann.faiss
+STAT_CACHE = "stat_cache.json"   # writer-only: mtimes of touched files, outside the snapshots
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(source: str, chunks: list[str]) -> list[str]:
+    """Stable ids: the same text in the same file always gets the same id."""
+    ids, seen = [], {}
+    for text in chunks:
+        base = hashlib.sha1(f"{source}\0{text}".encode("utf-8")).hexdigest()[:20]
+        seen[base] = seen.get(base, -1) + 1     # identical chunks within one file
+        ids.append(f"{base}-{seen[base]}")
+    return ids
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def current_snapshot(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, POINTER), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(root, SNAPSHOTS, name) if name else None
+
+
+def _read_ann(path: str):
+    """(index, metadata) of a snapshot's approximate index, or (None, None)."""
+    if not os.path.exists(os.path.join(path, ANN_META)):
+        return None, None
+    with open(os.path.join(path, ANN_META), encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["ids"] = {int(label): doc_id for label, doc_id in meta["ids"].items()}
+    return faiss.read_index(os.path.join(path, "ann.faiss")), meta
+
+
+def load_snapshot(path: str, embeddings) -> FAISS:
+    """Load a published snapshot, using its approximate index if it has one."""
+    store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    ann, meta = _read_ann(path)
+    if ann is not None:
+        store.index, store.index_to_docstore_id = ann, meta["ids"]
+    return store
+
+
+class IndexSyncer:
+    """Applies file additions, edits and deletions to the index; publishes snapshots."""
+
+    def __init__(self, docs_dir: str, root: str, embeddings, text_splitter=None,
+                 patterns=("*.txt", "*.md"), target_recall: float = 0.95, keep_snapshots: int = 3,
+                 ann_rebuild_growth: float = 2.0):
+        self.docs_dir = docs_dir
+        self.root = root
+        self.embeddings = embeddings
+        self.text_splitter = text_splitter or RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+        self.patterns = patterns
+        self.target_recall = target_recall
+        self.keep_snapshots = keep_snapshots
+        self.ann_rebuild_growth = ann_rebuild_growth
+        os.makedirs(os.path.join(root, SNAPSHOTS), exist_ok=True)
+
+        self.store: Optional[FAISS] = None
+        self.manifest: dict = {}          # source -> {"hash", "size", "mtime", "ids"}
+        self.skipped: dict = {}           # source -> (size, mtime) of files that could not be read
+        self.ann = None                   # IVF index over the same vectors, for large corpora
+        self.ann_ids: dict = {}           # ANN label -> docstore id
+        self.ann_report: dict = {}
+        self._ann_labels: dict = {}       # docstore id -> ANN label
+        self._next_label = 0
+        self._ann_built_for = 0
+        self._unpublished = False
+
+        # Resume from the last published snapshot
+        snapshot = current_snapshot(root)
+        if snapshot:
+            self.store = FAISS.load_local(snapshot, embeddings, allow_dangerous_deserialization=True)
+            with open(os.path.join(snapshot, "manifest.json"), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            self.ann, meta = _read_ann(snapshot)
+            if self.ann is not None:
+                self.ann_ids, self.ann_report = meta["ids"], meta["report"]
+                self._ann_built_for = meta["built_for"]
+                self._ann_labels = {doc_id: label for label, doc_id in self.ann_ids.items()}
+                self._next_label = max(self.ann_ids, default=-1) + 1
+        # Newer size/mtime/hash of files whose chunks did not change
+        try:
+            with open(os.path.join(root, STAT_CACHE), encoding="utf-8") as f:
+                for source, entry in json.load(f).items():
+                    if source in self.manifest and self.manifest[source]["ids"] == entry["ids"]:
+                        self.manifest[source] = entry
+        except (OSError, ValueError):
+            pass
+
+    # --- change detection ---------------------------------------------------
+
+    def _files(self) -> dict:
+        found = {}
+        for folder, _, names in os.walk(self.docs_dir):
+            for name in names:
+                if any(fnmatch.fnmatch(name, p) for p in self.patterns):
+                    path = os.path.join(folder, name)
+                    found[os.path.relpath(path, self.docs_dir).replace(os.sep, "/")] = path
+        return found
+
+    def scan(self) -> dict:
+        """Compare the folder with the manifest. Reads nothing, changes nothing.
+
+        Returns {"added", "changed", "deleted", "touched": [sources],
+        "stats": {source: (hash, size, mtime)}, "skipped": {source: error}}.
+        """
+        changes = {"added": [], "changed": [], "deleted": [], "touched": [], "stats": {}, "skipped": {}}
+        files = self._files()
+        for source, path in list(files.items()):
+            known = self.manifest.get(source)
+            try:
+                st = os.stat(path)
+                stat = (st.st_size, st.st_mtime_ns)
+                if known and (known["size"], known["mtime"]) == stat:
+                    continue                        # untouched: not even read
+                if self.skipped.get(source) == stat:
+                    continue                        # the same unreadable file as last time
+                digest = file_hash(path)
+            except FileNotFoundError:
+                del files[source]                   # deleted while we were scanning
+                continue
+            except OSError as e:
+                changes["skipped"][source] = f"{type(e).__name__}: {e}"
+                continue
+            changes["stats"][source] = (digest, *stat)
+            if known is None:
+                changes["added"].append(source)
+            elif known["hash"] != digest:
+                changes["changed"].append(source)
+            else:
+                changes["touched"].append(source)   # same content, new mtime
+        changes["deleted"] = [source for source in self.manifest if source not in files]
+        self.skipped = {source: stat for source, stat in self.skipped.items() if source in files}
+        return changes
+
+    # --- applying changes ---------------------------------------------------
+
+    def _chunks(self, source: str) -> list[Document]:
+        path = os.path.join(self.docs_dir, source)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        chunks = self.text_splitter.split_text(text)
+        ids = chunk_ids(source, chunks)
+        return [Document(page_content=c, metadata={"source": source, "chunk_id": i}, id=i)
+                for c, i in zip(chunks, ids)]
+
+    def sync(self) -> dict:
+        """One incremental pass. Publishes a snapshot if anything changed.
+
+        Nothing is committed until the new chunks are embedded: if embedding
+        fails, the store and manifest are as they were and the next pass
+        retries the same changes.
+        """
+        started = time.perf_counter()
+        changes = self.scan()
+        report = {"added": 0, "changed": 0, "deleted": len(changes["deleted"]), "embedded": 0, "reused": 0, "removed": 0,
+                  "skipped": changes["skipped"]}
+
+        manifest = dict(self.manifest)    # entries are replaced, never edited in place
+        old_ids, new_docs = set(), []
+        for source in changes["deleted"]:
+            old_ids.update(manifest.pop(source)["ids"])
+        for source in changes["added"] + changes["changed"]:
+            digest, size, mtime = changes["stats"][source]
+            try:
+                docs = self._chunks(source)
+            except (OSError, UnicodeDecodeError) as e:
+                # Not UTF-8, or deleted since the scan: keep what is indexed and retry
+                # once the file changes again
+                self.skipped[source] = (size, mtime)
+                report["skipped"][source] = f"{type(e).__name__}: {e}"
+                continue
+            if source in manifest:
+                old_ids.update(manifest[source]["ids"])
+            manifest[source] = {"hash": digest, "size": size, "mtime": mtime, "ids": [d.id for d in docs]}
+            new_docs.extend(docs)
+        for source in changes["touched"]:
+            digest, size, mtime = changes["stats"][source]
+            manifest[source] = {**manifest[source], "size": size, "mtime": mtime}
+
+        report["added"] = sum(source not in report["skipped"] for source in changes["added"])
+        report["changed"] = sum(source not in report["skipped"] for source in changes["changed"])
+        new_ids = {d.id for d in new_docs}
+        to_delete = sorted(old_ids - new_ids)
+        to_embed = [d for d in new_docs if d.id not in old_ids]
+        report["reused"] = len(new_ids & old_ids)
+        report["removed"] = len(to_delete)
+        report["embedded"] = len(to_embed)
+
+        vectors = None
+        if to_embed:
+            texts = [d.page_content for d in to_embed]
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+        # Embedding worked: apply everything
+        if to_delete or to_embed or manifest.keys() != self.manifest.keys():
+            self._unpublished = True
+        if to_delete:
+            self.store.delete(to_delete)
+        if to_embed:
+            if self.store is None:
+                self.store = FAISS(self.embeddings, faiss.IndexFlatL2(vectors.shape[1]), InMemoryDocstore(), {})
+            self.store.add_embeddings(zip(texts, vectors), metadatas=[d.metadata for d in to_embed],
+                                      ids=[d.id for d in to_embed])
+        self.manifest = manifest
+        try:
+            self._update_ann(to_delete, [d.id for d in to_embed], vectors)
+        except Exception:
+            self.ann = None               # rebuilt from the store on the next pass
+            raise
+
+        if self._unpublished:
+            report["snapshot"] = self.publish()
+        elif changes["stats"]:
+            # Only mtimes (or chunk-neutral edits) moved: snapshots stay immutable
+            _write_atomic(os.path.join(self.root, STAT_CACHE), json.dumps(self.manifest))
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    # --- approximate index --------------------------------------------------
+
+    def _update_ann(self, removed: list[str], added: list[str], vectors: Optional[np.ndarray]) -> None:
+        """Apply one sync's changes to the IVF index, or rebuild it if the corpus size moved a lot."""
+        total = self.store.index.ntotal if self.store is not None else 0
+        if choose_index(total, self.target_recall) == "flat":
+            self.ann, self.ann_ids, self._ann_labels = None, {}, {}
+            return
+        growth = self.ann_rebuild_growth
+        if self.ann is None or not self._ann_built_for / growth <= total <= self._ann_built_for * growth:
+            self.rebuild_ann()
+            return
+        if removed:
+            labels = np.array([self._ann_labels.pop(doc_id) for doc_id in removed], dtype=np.int64)
+            self.ann.remove_ids(labels)
+            for label in labels.tolist():
+                del self.ann_ids[label]
+        if added:
+            labels = np.arange(self._next_label, self._next_label + len(added), dtype=np.int64)
+            self.ann.add_with_ids(vectors, labels)
+            self._next_label += len(added)
+            self.ann_ids.update(zip(labels.tolist(), added))
+            self._ann_labels.update(zip(added, labels.tolist()))
+
+    def rebuild_ann(self) -> dict:
+        """Retrain and re-tune the IVF index from the stored vectors (nothing is re-embedded).
+
+        sync() does this only when the corpus has grown or shrunk by
+        ann_rebuild_growth since the last build. After many edits of similar
+        size, call it on a schedule of your own (e.g. nightly), then publish().
+        """
+        total = self.store.index.ntotal
+        vectors = self.store.index.reconstruct_n(0, total)
+        ann = empty_index("ivf", vectors.shape[1], total)
+        train(ann, vectors)
+        ann.set_direct_map_type(faiss.DirectMap.Hashtable)   # lets rerankers read vectors back by label
+        ann.add_with_ids(vectors, np.arange(total, dtype=np.int64))
+        self.ann_report = tune(ann, vectors, self.target_recall)
+        self.ann = ann
+        self.ann_ids = {i: self.store.index_to_docstore_id[i] for i in range(total)}
+        self._ann_labels = {doc_id: label for label, doc_id in self.ann_ids.items()}
+        self._next_label = self._ann_built_for = total
+        self._unpublished = True
+        return self.ann_report
+
+    # --- publishing ---------------------------------------------------------
+
+    def publish(self) -> str:
+        """Write a complete new snapshot, then switch CURRENT to it in one rename."""
+        name = f"{time.time_ns():020d}"
+        snapshots = os.path.join(self.root, SNAPSHOTS)
+        tmp = os.path.join(snapshots, f".tmp-{name}")
+        os.makedirs(tmp)
+        if self.store is not None:
+            self.store.save_local(tmp)
+        if self.ann is not None:
+            faiss.write_index(self.ann, os.path.join(tmp, "ann.faiss"))
+            with open(os.path.join(tmp, ANN_META), "w", encoding="utf-8") as f:
+                json.dump({"built_for": self._ann_built_for, "report": self.ann_report, "ids": self.ann_ids}, f)
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, os.path.join(snapshots, name))
+        _write_atomic(os.path.join(self.root, POINTER), name)
+        self._unpublished = False
+
+        # Old snapshots may still be loading in a reader: keep a few
+        published = sorted(n for n in os.listdir(snapshots) if not n.startswith("."))
+        for old in published[: -self.keep_snapshots]:
+            shutil.rmtree(os.path.join(snapshots, old), ignore_errors=True)
+        return name
+
+    def watch(self, interval: float = 5.0, on_sync: Optional[Callable[[dict], None]] = None) -> None:
+        """Poll the directory forever (Ctrl+C to stop). A failed pass is logged and retried."""
+        while True:
+            try:
+                report = self.sync()
+            except Exception as e:
+                # Embedding API down, disk full, ...: the daemon keeps going
+                print(f"IndexSyncer: sync failed ({type(e).__name__}: {e}); retrying in {interval}s")
+            else:
+                if on_sync and ("snapshot" in report or report["skipped"]):
+                    on_sync(report)
+            time.sleep(interval)
+
+
+class LiveIndex:
+    """Read side: always serves the latest published snapshot."""
+
+    def __init__(self, root: str, embeddings, poll_interval: float = 1.0):
+        self.root = root
+        self.embeddings = embeddings
+        self.poll_interval = poll_interval
+        self.snapshot: Optional[str] = None
+        self.current: Optional[FAISS] = None
+        self.swaps = 0
+        self._stop = threading.Event()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Load the newest snapshot if CURRENT moved. Queries keep using the old one meanwhile."""
+        snapshot = current_snapshot(self.root)
+        if snapshot is None or snapshot == self.snapshot:
+            return False
+        store = load_snapshot(snapshot, self.embeddings)
+        # A single reference assignment: a query sees either the old store or the new one
+        self.current, self.snapshot = store, snapshot
+        self.swaps += 1
+        return True
+
+    def start(self) -> "LiveIndex":
+        def loop():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # E.g. the writer pruned the snapshot we were loading, or it is
+                    # corrupt; keep serving the current one and try again next poll
+                    print(f"LiveIndex: reload failed ({type(e).__name__}: {e}); will retry")
+
+        threading.Thread(target=loop, daemon=True, name="live-index").start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def as_retriever(self, make_retriever: Optional[Callable[[FAISS], BaseRetriever]] = None) -> BaseRetriever:
+        return SnapshotRetriever(live=self, make_retriever=make_retriever)
+
+
+class SnapshotRetriever(BaseRetriever):
+    """Delegates each query to a retriever over the live index's current snapshot."""
+
+    live: LiveIndex
+    make_retriever: Optional[Callable[[FAISS], BaseRetriever]] = None
+    _cached: tuple = (None, None)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _retriever(self) -> BaseRetriever:
+        store = self.live.current
+        if store is None:
+            raise RuntimeError(f"No snapshot published in {self.live.root} yet")
+        cached_store, retriever = self._cached
+        if cached_store is not store:
+            make = self.make_retriever or (lambda vs: vs.as_retriever(search_kwargs={"k": 4}))
+            retriever = make(store)
+            self._cached = (store, retriever)
+        return retriever
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return self._retriever().invoke(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return await self._retriever().ainvoke(query)
@@ -0,0 +1,228 @@
+"""Vector search split across several local worker processes.
+
+Import from a script in this folder, e.g. `from sharded_search import ShardedVectorStore`.
+
+    store = ShardedVectorStore.from_documents(splits, embeddings, n_shards=4)
+    retriever = store.as_retriever(k=2)          # drop-in for vectorstore.as_retriever()
+    rag_chain = {"context": retriever | format_docs, ...} | prompt | model
+    store.close()
+
+Each shard of the vectors lives in its own process with its own FAISS index
+and threads, so search uses several cores without competing with the chain
+code for the GIL. The shard indexes are built in the calling process, so all
+vectors must fit in its memory while building. After that the
+vectors live only in the workers, and the calling process keeps the
+documents.
+
+A query is sent to every shard at once (scatter). Each shard returns its own
+top k with global ids, and the results are merged (gather). Workers are
+fresh interpreters running this file (not multiprocessing), so the calling
+script's top-level code never runs twice. They talk over local sockets.
+"""
+import os
+import sys
+import queue
+import asyncio
+import secrets
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from multiprocessing.connection import Client, Listener
+from typing import Any, Optional
+import numpy as np
+import faiss
+from langchain_core.retrievers import BaseRetriever
+from vector_index import build_index, search_params
+
+
+class ShardedVectorStore:
+    """Scatter-gather search over N worker processes, one index shard each."""
+
+    def __init__(self, shard_dir: str, documents: list, n_shards: int, embeddings=None,
+                 threads_per_shard: int = 1, owns_dir: bool = False):
+        self.shard_dir = shard_dir
+        self.documents = documents        # global id -> Document
+        self.embeddings = embeddings
+        self._owns_dir = owns_dir
+        self._authkey = secrets.token_bytes(16)
+        self._processes, self._addresses = [], []
+        # One connection per shard per concurrent caller, reused across queries
+        self._idle = queue.SimpleQueue()
+        for shard in range(n_shards):
+            process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--shard", os.path.join(shard_dir, f"shard{shard}"),
+                 "--threads", str(threads_per_shard)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            self._processes.append(process)
+            try:
+                process.stdin.write(self._authkey.hex() + "\n")
+                process.stdin.flush()
+            except BrokenPipeError:
+                pass                      # already exited; its stderr says why
+            line = process.stdout.readline()   # the worker prints its port once ready
+            if not line.strip().isdigit():
+                _, error = process.communicate()
+                self.close()
+                raise RuntimeError(f"shard worker {shard} failed to start:\n{error.strip()}")
+            # Keep showing the worker's warnings and errors in this process's stderr
+            threading.Thread(target=shutil.copyfileobj, args=(process.stderr, sys.stderr), daemon=True).start()
+            self._addresses.append(("127.0.0.1", int(line)))
+
+    # --- building -----------------------------------------------------------
+
+    @classmethod
+    def from_vectors(cls, vectors, documents: list, n_shards: int = 4, embeddings=None,
+                     target_recall: float = 0.95, shard_dir: Optional[str] = None, **kwargs):
+        """Split vectors into n_shards contiguous shards and start a worker for each."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        owns_dir = shard_dir is None
+        shard_dir = shard_dir or tempfile.mkdtemp(prefix="faiss-shards-")
+        os.makedirs(shard_dir, exist_ok=True)
+        bounds = np.linspace(0, len(vectors), n_shards + 1).astype(np.int64)
+        for shard, (start, stop) in enumerate(zip(bounds, bounds[1:])):
+            # Each shard gets the index type that suits its own size
+            index, _ = build_index(vectors[start:stop], target_recall)
+            faiss.write_index(index, os.path.join(shard_dir, f"shard{shard}.faiss"))
+            np.save(os.path.join(shard_dir, f"shard{shard}.offset.npy"), np.array([start]))
+        return cls(shard_dir, documents, n_shards, embeddings, owns_dir=owns_dir, **kwargs)
+
+    @classmethod
+    def from_documents(cls, documents: list, embeddings, n_shards: int = 4, **kwargs):
+        vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+        return cls.from_vectors(vectors, list(documents), n_shards, embeddings, **kwargs)
+
+    @classmethod
+    def from_faiss(cls, vectorstore, n_shards: int = 4, **kwargs):
+        """Shard an existing langchain FAISS store (its vectors are reused, not re-embedded)."""
+        total = vectorstore.index.ntotal
+        vectors = vectorstore.index.reconstruct_n(0, total)
+        documents = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]) for i in range(total)]
+        return cls.from_vectors(vectors, documents, n_shards, vectorstore.embedding_function, **kwargs)
+
+    # --- searching ----------------------------------------------------------
+
+    def _connections(self) -> list:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return [Client(address, authkey=self._authkey) for address in self._addresses]
+
+    def search(self, queries, k: int = 4, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """(distances, global ids) of the k nearest vectors for each query, like index.search."""
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        connections = self._connections()
+        try:
+            # Scatter: every shard starts searching before we wait for any of them
+            for conn in connections:
+                conn.send((queries, k, nprobe, ef_search))
+            results = [conn.recv() for conn in connections]
+        except Exception:
+            for conn in connections:
+                conn.close()
+            raise
+        self._idle.put(connections)
+
+        # Gather: merge the per-shard top k into a global top k
+        distances = np.concatenate([d for d, _ in results], axis=1)
+        ids = np.concatenate([i for _, i in results], axis=1)
+        distances[ids < 0] = np.inf
+        k = min(k, distances.shape[1])
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, top, axis=1).argsort(axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        return np.take_along_axis(distances, top, axis=1), np.take_along_axis(ids, top, axis=1)
+
+    def similarity_search_by_vector(self, vector, k: int = 4, **kwargs) -> list:
+        _, ids = self.search(vector, k, **kwargs)
+        return [self.documents[i] for i in ids[0] if i >= 0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k, **kwargs)
+
+    def as_retriever(self, k: int = 4, **search_kwargs) -> "ShardedRetriever":
+        return ShardedRetriever(store=self, k=k, search_kwargs=search_kwargs)
+
+    def close(self) -> None:
+        while True:
+            try:
+                for conn in self._idle.get_nowait():
+                    conn.close()
+            except queue.Empty:
+                break
+        for process in self._processes:
+            if not process.stdin.closed:
+                try:
+                    process.stdin.close()   # the worker exits when its stdin closes
+                except BrokenPipeError:
+                    pass
+            process.terminate()
+            process.wait()
+        if self._owns_dir:
+            shutil.rmtree(self.shard_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardedRetriever(BaseRetriever):
+    """LCEL retriever over a ShardedVectorStore."""
+
+    store: Any
+    k: int = 4
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return self.store.similarity_search(query, self.k, **self.search_kwargs)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        vector = await self.store.embeddings.aembed_query(query)
+        # The socket round trips block, so they run off the event loop
+        return await asyncio.to_thread(self.store.similarity_search_by_vector, vector, self.k, **self.search_kwargs)
+
+
+# --- worker process ----------------------------------------------------------
+
+def _serve(conn, index, offset: int) -> None:
+    with conn:
+        while True:
+            try:
+                queries, k, nprobe, ef_search = conn.recv()
+            except EOFError:
+                return
+            # FAISS releases the GIL while searching, so connections run in parallel
+            distances, ids = index.search(queries, k, params=search_params(index, nprobe, ef_search))
+            conn.send((distances, np.where(ids >= 0, ids + offset, -1)))
+
+
+def _worker_main() -> None:
+    parser = argparse.ArgumentParser(description="Serve one FAISS shard over a local socket.")
+    parser.add_argument("--shard", required=True, help="path prefix of the shard files")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+
+    def exit_with_parent():
+        sys.stdin.read()          # EOF once the parent process is gone
+        os._exit(0)
+
+    threading.Thread(target=exit_with_parent, daemon=True).start()
+    faiss.omp_set_num_threads(args.threads)
+    index = faiss.read_index(f"{args.shard}.faiss")
+    offset = int(np.load(f"{args.shard}.offset.npy")[0])
+
+    listener = Listener(("127.0.0.1", 0), backlog=128, authkey=authkey)
+    print(listener.address[1], flush=True)
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_serve, args=(conn, index, offset), daemon=True).start()
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,180 @@
+"""Pick an exact or approximate FAISS index to suit the corpus.
+
+Import from a script in this folder, e.g. `from vector_index import from_documents`.
+
+    vectorstore = from_documents(splits, embeddings, target_recall=0.95)
+    retriever = ANNRetriever(vectorstore=vectorstore, k=4, ef_search=128)
+
+FAISS.from_documents always builds a flat index, which compares the query
+with every chunk: fine for thousands of chunks, slow for millions.
+
+    chunks              index   query-time knob
+    < 20,000            Flat    - (exact)
+    < 1,000,000         HNSW    efSearch: graph nodes visited per query
+    more                IVF     nprobe: clusters scanned per query
+
+After building an approximate index, the knob is tuned on a sample of the
+corpus: it is raised until recall@k against an exact search reaches
+target_recall. The tuned value becomes the index default, and any retriever
+can override it per query.
+"""
+import math
+from typing import Any, Optional
+import numpy as np
+import faiss
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+FLAT_MAX = 20_000
+HNSW_MAX = 1_000_000
+EF_SEARCH_STEPS = [16, 32, 64, 128, 256, 512, 1024]
+
+
+def choose_index(n: int, target_recall: float = 0.95) -> str:
+    """'flat', 'hnsw' or 'ivf' for a corpus of n vectors."""
+    if n < FLAT_MAX or target_recall >= 0.999:
+        return "flat"
+    if n < HNSW_MAX:
+        return "hnsw"
+    return "ivf"
+
+
+def ivf_lists(n: int) -> int:
+    """Number of IVF clusters: about 4 * sqrt(n), rounded to a power of two."""
+    return 2 ** max(4, round(math.log2(4 * math.sqrt(n))))
+
+
+def empty_index(kind: str, dim: int, n: int, hnsw_m: int = 32):
+    """An index of the given kind. IVF indexes still need train() before add()."""
+    if kind == "flat":
+        return faiss.IndexFlatL2(dim)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = 80
+        return index
+    if kind == "ivf":
+        quantizer = faiss.IndexFlatL2(dim)
+        return faiss.IndexIVFFlat(quantizer, dim, min(ivf_lists(n), max(1, n // 39)))
+    raise ValueError(f"unknown index kind {kind!r}")
+
+
+def train(index, vectors: np.ndarray, sample_size: Optional[int] = None, seed: int = 0) -> None:
+    """Train IVF centroids on a random sample instead of the whole corpus."""
+    if index.is_trained:
+        return
+    sample_size = sample_size or 40 * index.nlist  # FAISS wants >= 39 points per centroid
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    index.train(np.ascontiguousarray(sample))
+
+
+def search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Per-query FAISS parameters, or None to use the index defaults."""
+    if nprobe is not None and hasattr(index, "nprobe"):
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if ef_search is not None and hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+
+def search_vectors(vectorstore, query_vectors, k: int, params=None):
+    """(distances, indices) for many query vectors in one index.search call.
+
+    Normalizes the queries if the store was built with normalize_L2 (the
+    langchain FAISS store keeps that flag private), and passes per-call
+    search parameters from search_params().
+    """
+    queries = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        faiss.normalize_L2(queries)
+    return vectorstore.index.search(queries, min(k, vectorstore.index.ntotal), params=params)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Share of the true k nearest neighbours that were found."""
+    hits = (found[:, :, None] == truth[:, None, :]).any(axis=2)
+    return float(hits.sum()) / truth.size
+
+
+def tune(index, vectors: np.ndarray, target_recall: float = 0.95, k: int = 10,
+         n_queries: int = 200, seed: int = 0) -> dict:
+    """Smallest efSearch / nprobe reaching target_recall; set as the index default.
+
+    Queries are corpus vectors moved by about one nearest-neighbour distance
+    in a random direction, so they fall between chunks like real questions do;
+    ground truth comes from an exact search over the same array (faiss.knn,
+    so the corpus is not copied into a second index).
+    """
+    if not hasattr(index, "hnsw") and not hasattr(index, "nprobe"):
+        return {"kind": "flat", "recall": 1.0}
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    distances, _ = faiss.knn(vectors[picks], vectors, 2)
+    step = float(np.median(np.sqrt(distances[:, 1])))
+    directions = rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    queries = vectors[picks] + step * directions
+    _, truth = faiss.knn(queries, vectors, k)
+
+    if hasattr(index, "hnsw"):
+        name, steps = "ef_search", EF_SEARCH_STEPS
+    else:
+        name, steps = "nprobe", [2 ** i for i in range(int(math.log2(index.nlist)) + 1)]
+
+    for value in steps:
+        _, found = index.search(queries, k, params=search_params(index, **{name: value}))
+        recall = recall_at_k(found, truth)
+        if recall >= target_recall:
+            break
+    if name == "ef_search":
+        index.hnsw.efSearch = value
+    else:
+        index.nprobe = value
+    return {"kind": "hnsw" if name == "ef_search" else "ivf", name: value, "recall": recall}
+
+
+def build_index(vectors, target_recall: float = 0.95, kind: Optional[str] = None, k: int = 10):
+    """Choose, train, fill and tune an index. Returns (index, tuning report)."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    kind = kind or choose_index(len(vectors), target_recall)
+    index = empty_index(kind, vectors.shape[1], len(vectors))
+    train(index, vectors)
+    index.add(vectors)
+    return index, tune(index, vectors, target_recall, k)
+
+
+def from_documents(documents, embeddings, target_recall: float = 0.95, kind: Optional[str] = None):
+    """Like FAISS.from_documents, but with an index chosen for the corpus size."""
+    texts = [doc.page_content for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    kind = kind or choose_index(len(vectors), target_recall)
+    index = empty_index(kind, vectors.shape[1], len(vectors))
+    train(index, vectors)
+
+    vectorstore = FAISS(embeddings, index, InMemoryDocstore(), {})
+    vectorstore.add_embeddings(zip(texts, vectors.tolist()), metadatas=[doc.metadata for doc in documents])
+    vectorstore.index_report = tune(index, vectors, target_recall)
+    return vectorstore
+
+
+class ANNRetriever(BaseRetriever):
+    """Top-k retriever with its own nprobe / efSearch, overriding the index default."""
+
+    vectorstore: Any
+    k: int = 4
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+
+    def _search(self, query_vector) -> list:
+        params = search_params(self.vectorstore.index, self.nprobe, self.ef_search)
+        _, indices = search_vectors(self.vectorstore, query_vector, self.k, params)
+        return [self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[int(i)])
+                for i in indices[0] if i != -1]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return self._search(self.vectorstore._embed_query(query))
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return self._search(await self.vectorstore._aembed_query(query))
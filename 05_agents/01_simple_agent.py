@@ -2,7 +2,9 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage
+from tool_runtime import ToolRegistry, pure_tool, cache_stats
+from calculator_engine import evaluate
 
 # Load environment variables
 load_dotenv()
@@ -11,15 +13,19 @@ print("=== Module 5: Agents (Simplified) ===\n")
 print("Note: This is a simplified agent demonstration using tool binding.\n")
 
 # 1. Define Tools using @tool decorator
+# Both tools are deterministic, so @pure_tool caches their results
+@pure_tool()
 @tool
 def calculator(expression: str) -> str:
     """Evaluates a mathematical expression. Input should be like '2+2' or '10*5'."""
     try:
-        result = eval(expression)
+        # Sandboxed arithmetic (no eval): parsed once, then served from a cache
+        result = evaluate(expression)
         return f"{result}"
     except Exception as e:
         return f"Error: {str(e)}"
 
+@pure_tool()
 @tool
 def get_word_length(word: str) -> int:
     """Returns the length of a word."""
@@ -35,6 +41,9 @@ llm = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
 tools = [calculator, get_word_length]
 llm_with_tools = llm.bind_tools(tools)
 
+# Build the name -> tool lookup once and reuse it for every tool call
+registry = ToolRegistry(tools, default_timeout=10.0)
+
 print("=== How Agents Work ===")
 print("1. User asks a question")
 print("2. LLM decides if it needs to use a tool")
@@ -60,24 +69,19 @@ def run_agent(question: str):
         # Add LLM's response to messages
         messages.append(response)
         
-        # Step 2: Execute each tool call
+        # Step 2: Execute the tool calls
+        # Calls from the same LLM turn don't depend on each other, so they
+        # run concurrently; results come back in the original order.
         for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            
-            print(f"   → Calling {tool_name} with args: {tool_args}")
-            
-            # Find and execute the tool
-            selected_tool = {t.name: t for t in tools}[tool_name]
-            tool_output = selected_tool.invoke(tool_args)
-            
-            print(f"   ← Tool returned: {tool_output}")
-            
-            # Add tool result to messages
-            messages.append(ToolMessage(
-                content=str(tool_output),
-                tool_call_id=tool_call['id']
-            ))
+            print(f"   → Calling {tool_call['name']} with args: {tool_call['args']}")
+
+        tool_messages = registry.execute(response.tool_calls)
+
+        for tool_message in tool_messages:
+            print(f"   ← Tool returned: {tool_message.content}")
+
+        # Add tool results to messages
+        messages.extend(tool_messages)
         
         # Step 3: Ask LLM again with tool results
         final_response = llm_with_tools.invoke(messages)
@@ -101,3 +105,9 @@ print("\n" + "="*60)
 print("TEST 3: No Tool Needed")
 print("="*60)
 run_agent("What is the capital of France?")
+
+print("\n" + "="*60)
+print("Tool Cache Stats")
+print("="*60)
+for name, stats in cache_stats().items():
+    print(f"{name}: {stats['hits']} hits, {stats['misses']} misses")
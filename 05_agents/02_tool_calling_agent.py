@@ -1,9 +1,11 @@
 import os
+import asyncio
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
+from tool_runtime import pure_tool, cache_stats
 
 # Load environment variables
 load_dotenv()
@@ -12,17 +14,22 @@ print("=== Module 5: Advanced Agent with Structured Tools ===\n")
 
 # 1. Define Tools using the @tool decorator
 # This is the modern LangChain 1.0 way
+# @pure_tool marks deterministic tools: repeated calls with the same
+# arguments are answered from a cache instead of running the tool again.
 
+@pure_tool()
 @tool
 def get_word_length(word: str) -> int:
     """Returns the length of a word. Input should be a single word."""
     return len(word)
 
+@pure_tool()
 @tool
 def reverse_string(text: str) -> str:
     """Reverses a string. Input should be any text."""
     return text[::-1]
 
+@pure_tool()
 @tool
 def count_vowels(text: str) -> int:
     """Counts the number of vowels in a text. Input should be any text."""
@@ -58,8 +65,15 @@ agent_executor = AgentExecutor(
 )
 
 # 7. Test
+# ainvoke() matters here: when the LLM asks for several tools in one turn,
+# the async executor runs them concurrently (asyncio.gather), while
+# invoke() runs them one after another.
 print("=== Test: Multi-tool Usage ===")
-result = agent_executor.invoke({
+result = asyncio.run(agent_executor.ainvoke({
     "input": "For the word 'LangChain', tell me its length, reverse it, and count the vowels."
-})
+}))
 print(f"\nFinal Answer: {result['output']}\n")
+
+print("=== Tool Cache Stats ===")
+for name, stats in cache_stats().items():
+    print(f"{name}: {stats['hits']} hits, {stats['misses']} misses")
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import asyncio
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.tools import tool
+from langchain_core.messages import HumanMessage
+from tool_runtime import ToolRegistry
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 5: Streaming Tool Execution ===\n")
+print("Tools start as soon as their arguments have streamed in,")
+print("while the LLM is still generating the rest of its turn.\n")
+
+
+# 1. Define Tools
+# The sleeps stand in for I/O (an API call, a database lookup)
+@tool
+async def get_word_length(word: str) -> int:
+    """Returns the length of a word. Input should be a single word."""
+    await asyncio.sleep(1)
+    return len(word)
+
+@tool
+async def reverse_string(text: str) -> str:
+    """Reverses a string. Input should be any text."""
+    await asyncio.sleep(1)
+    return text[::-1]
+
+@tool
+async def count_vowels(text: str) -> int:
+    """Counts the number of vowels in a text. Input should be any text."""
+    await asyncio.sleep(1)
+    return sum(1 for char in text if char in "aeiouAEIOU")
+
+tools = [get_word_length, reverse_string, count_vowels]
+registry = ToolRegistry(tools, default_timeout=10.0)
+
+# 2. Setup LLM with Tool Binding
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+llm = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
+llm_with_tools = llm.bind_tools(tools)
+
+
+# 3. Tool-call Assembly
+class ToolCallAssembler:
+    """Collects tool_call_chunks and reports each call once its arguments are complete.
+
+    A call is complete when its argument string parses as a JSON object, or,
+    at the latest, when the next call starts streaming. Calls are told apart
+    by their chunk index; providers that leave the index out get their
+    calls told apart by id instead. Parsing is only attempted once the
+    buffer ends with '}', so long arguments are not re-parsed on every chunk.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._done = set()
+        self._last = None
+
+    def feed(self, tool_call_chunks) -> list[dict]:
+        completed = []
+        for chunk in tool_call_chunks:
+            key = chunk.get("index")
+            if key is None:
+                # No index: a new id starts a new call, no id continues the last one
+                key = chunk.get("id") or self._last
+            if key is None:
+                key = 0
+            if key not in self._calls:
+                # Calls stream one after another, so a new call closes the earlier ones
+                for earlier in list(self._calls):
+                    completed += self._complete(earlier, strict=False)
+                self._calls[key] = {"name": "", "args": "", "id": None}
+            self._last = key
+            call = self._calls[key]
+            if chunk.get("id"):
+                call["id"] = chunk["id"]
+            if chunk.get("name"):
+                call["name"] += chunk["name"]
+            if chunk.get("args"):
+                call["args"] += chunk["args"]
+            if call["args"].rstrip().endswith("}"):
+                completed += self._complete(key, strict=True)
+        return completed
+
+    def flush(self) -> list[dict]:
+        completed = []
+        for key in list(self._calls):
+            completed += self._complete(key, strict=False)
+        return completed
+
+    def _complete(self, key, strict: bool) -> list[dict]:
+        if key in self._done:
+            return []
+        call = self._calls[key]
+        try:
+            args = json.loads(call["args"] or "{}")
+        except json.JSONDecodeError:
+            if strict:
+                return []
+            args = None
+        if not call["name"] or not call["id"] or not isinstance(args, dict):
+            # Leave malformed calls to the final AIMessage's tool_calls
+            return []
+        self._done.add(key)
+        return [{"name": call["name"], "args": args, "id": call["id"], "type": "tool_call"}]
+
+
+# 4. Streaming Agent Loop
+async def run_agent(question: str, max_iterations: int = 3):
+    print(f"\n📝 Question: {question}")
+    print("-" * 60)
+
+    messages = [HumanMessage(content=question)]
+    start = time.perf_counter()
+
+    for _ in range(max_iterations):
+        assembler = ToolCallAssembler()
+        running = {}
+        response = None
+
+        def start_tool(tool_call) -> bool:
+            # Each call id runs once, even if the stream repeats it
+            if tool_call["id"] in running:
+                return False
+            running[tool_call["id"]] = asyncio.create_task(registry.arun(tool_call))
+            return True
+
+        try:
+            async for chunk in llm_with_tools.astream(messages):
+                response = chunk if response is None else response + chunk
+                for tool_call in assembler.feed(chunk.tool_call_chunks):
+                    if start_tool(tool_call):
+                        print(f"   → [{time.perf_counter() - start:5.2f}s] starting {tool_call['name']}{tool_call['args']} (LLM still streaming)")
+
+            print(f"   ✓ [{time.perf_counter() - start:5.2f}s] LLM finished its turn")
+            for tool_call in assembler.flush():
+                start_tool(tool_call)
+
+            if response is None or not response.tool_calls:
+                print(f"\n✅ Final Answer: {response.content if response else ''}")
+                return
+
+            messages.append(response)
+            # Results go back in the order the LLM asked for them
+            for tool_call in response.tool_calls:
+                start_tool(tool_call)
+                tool_message = await running[tool_call["id"]]
+                print(f"   ← [{time.perf_counter() - start:5.2f}s] {tool_call['name']} returned: {tool_message.content}")
+                messages.append(tool_message)
+        finally:
+            # If the stream failed (or we stopped early), don't leave tools running
+            for task in running.values():
+                task.cancel()
+
+    print("\n⚠️ Stopped after max_iterations without a final answer")
+
+
+# 5. Test
+if __name__ == "__main__":
+    asyncio.run(run_agent(
+        "For the word 'LangChain', tell me its length, reverse it, and count the vowels."
+    ))
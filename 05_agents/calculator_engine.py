@@ -0,0 +1,228 @@
+"""A small, sandboxed arithmetic engine for the calculator tool.
+
+Replaces eval(): expressions are parsed to an AST once, checked against a
+whitelist of arithmetic nodes, and compiled into nested Python closures.
+Compiled expressions are cached, so a repeated expression skips parsing.
+
+Because the compiled closures only use operators and NumPy ufuncs, the same
+compiled expression also evaluates element-wise over NumPy arrays:
+
+    >>> evaluate("2 * x + 1", x=3)
+    7
+    >>> evaluate_batch("2 * x + 1", {"x": [1, 2, 3]})
+    array([3, 5, 7])
+"""
+import ast
+import math
+import operator
+import time
+from functools import lru_cache
+import numpy as np
+
+# Limits that keep a single call cheap, whatever the LLM sends
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPONENT = 1000
+MAX_INT_BITS = 4096
+MAX_EVAL_SECONDS = 0.1
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid, not allowed, or too expensive."""
+
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# NumPy functions work on plain numbers and on arrays alike
+_FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "min": np.minimum,
+    "max": np.maximum,
+    "round": np.round,
+}
+
+# Number of arguments each function takes: (fewest, most). NumPy ufuncs
+# would read a surplus argument as their `out` array.
+_ARITY = {name: (1, 1) for name in _FUNCTIONS}
+_ARITY.update({"min": (2, 2), "max": (2, 2), "round": (1, 2)})
+
+_CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+}
+
+
+def _check_size(value):
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise CalculatorError(f"result is larger than {MAX_INT_BITS} bits")
+    return value
+
+
+def _check_int_cost(is_pow, a, b):
+    """Reject integer ** and * whose result cannot fit, before spending time on it."""
+    if type(a) is not int or type(b) is not int:
+        return
+    if is_pow:
+        too_big = b > 0 and abs(a) > 1 and math.log2(abs(a)) * b > MAX_INT_BITS
+    else:
+        too_big = a and b and a.bit_length() + b.bit_length() - 1 > MAX_INT_BITS
+    if too_big:
+        raise CalculatorError(f"result is larger than {MAX_INT_BITS} bits")
+
+
+def _check_exponent(exponent):
+    largest = np.max(np.abs(exponent)) if isinstance(exponent, np.ndarray) else abs(exponent)
+    if largest > MAX_EXPONENT:
+        raise CalculatorError(f"exponent larger than {MAX_EXPONENT} is not allowed")
+
+
+def _compile_node(node, variables: set):
+    """Turn one AST node into a closure fn(env, deadline) -> value."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculatorError(f"only numbers are allowed, got {node.value!r}")
+        value = node.value
+        return lambda env, deadline: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in _CONSTANTS:
+            value = _CONSTANTS[name]
+            return lambda env, deadline: value
+        variables.add(name)
+
+        def load(env, deadline):
+            try:
+                return env[name]
+            except KeyError:
+                raise CalculatorError(f"no value given for variable '{name}'") from None
+
+        return load
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand, variables)
+        return lambda env, deadline: op(operand(env, deadline))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        op = _BINARY_OPS[type(node.op)]
+        is_pow = isinstance(node.op, ast.Pow)
+        is_int_costly = is_pow or isinstance(node.op, ast.Mult)
+        left = _compile_node(node.left, variables)
+        right = _compile_node(node.right, variables)
+
+        def binop(env, deadline):
+            a = left(env, deadline)
+            b = right(env, deadline)
+            if time.perf_counter() > deadline:
+                raise CalculatorError(f"evaluation took longer than {MAX_EVAL_SECONDS}s")
+            if is_pow:
+                _check_exponent(b)
+            if is_int_costly:
+                _check_int_cost(is_pow, a, b)
+            try:
+                result = _check_size(op(a, b))
+            except OverflowError:
+                raise CalculatorError("result is too large") from None
+            if isinstance(result, complex):
+                # e.g. (-8)**(1/3): Python answers with a complex root
+                raise CalculatorError("result is not a real number")
+            return result
+
+        return binop
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        func = _FUNCTIONS.get(node.func.id)
+        if func is None:
+            raise CalculatorError(f"unknown function '{node.func.id}'")
+        name = node.func.id
+        fewest, most = _ARITY[name]
+        if not fewest <= len(node.args) <= most:
+            expected = str(fewest) if fewest == most else f"{fewest} to {most}"
+            raise CalculatorError(f"{name}() takes {expected} argument(s), got {len(node.args)}")
+        args = [_compile_node(arg, variables) for arg in node.args]
+
+        def call(env, deadline):
+            values = [arg(env, deadline) for arg in args]
+            try:
+                return func(*values)
+            except OverflowError:
+                # e.g. max(2**100, 3): NumPy cannot hold the integer
+                raise CalculatorError(f"arguments of {name}() are too large") from None
+            except TypeError as e:
+                # e.g. round(x, 1.5)
+                raise CalculatorError(f"invalid arguments for {name}(): {e}") from None
+
+        return call
+
+    raise CalculatorError(f"{type(node).__name__} is not allowed in arithmetic expressions")
+
+
+class CompiledExpression:
+    def __init__(self, source: str):
+        if len(source) > MAX_EXPRESSION_LENGTH:
+            raise CalculatorError(f"expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise CalculatorError(f"invalid expression: {e.msg}") from None
+        self.source = source
+        variables = set()
+        self._fn = _compile_node(tree.body, variables)
+        self.variables = frozenset(variables)
+
+    def evaluate(self, **bindings):
+        return self._fn(bindings, time.perf_counter() + MAX_EVAL_SECONDS)
+
+    def evaluate_batch(self, bindings):
+        """Evaluate once over arrays of bindings, element-wise (NumPy broadcasting)."""
+        arrays = {name: np.asarray(values) for name, values in bindings.items()}
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return self._fn(arrays, time.perf_counter() + MAX_EVAL_SECONDS)
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> CompiledExpression:
+    """Parse and compile an expression once; repeated expressions hit the cache."""
+    return CompiledExpression(source)
+
+
+def evaluate(source: str, **bindings):
+    """Evaluate a single arithmetic expression, e.g. evaluate('15 * 7')."""
+    return compile_expression(source).evaluate(**bindings)
+
+
+def evaluate_batch(source: str, bindings):
+    """Evaluate one expression over many bindings, e.g. {'x': [1, 2, 3]}."""
+    return compile_expression(source).evaluate_batch(bindings)
+
+
+def evaluate_many(sources, bindings=None) -> list:
+    """Evaluate many expressions in one call. Errors are returned, not raised."""
+    bindings = bindings or {}
+    results = []
+    for source in sources:
+        try:
+            results.append(compile_expression(source).evaluate(**bindings))
+        except (ArithmeticError, TypeError, ValueError) as e:   # CalculatorError is a ValueError
+            results.append(e)
+    return results
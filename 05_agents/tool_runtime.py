@@ -0,0 +1,190 @@
+"""Shared helpers for running the tool calls an LLM asks for.
+
+Import from a script in this folder, e.g. `from tool_runtime import ToolRegistry`
+(scripts are run from the repo root, e.g. `python 05_agents/01_simple_agent.py`,
+so this folder is on sys.path).
+"""
+import asyncio
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import ToolMessage
+
+
+class ToolRegistry:
+    """Looks tools up by name and runs a turn's tool calls concurrently.
+
+    The name -> tool lookup is built once, not per call. Async tools run on
+    the event loop, sync tools on a thread pool. Every call has a timeout, and
+    results come back in the same order as the tool calls, whatever order
+    they finish in.
+
+    Note: a timed-out sync tool keeps running in its thread; the agent just
+    stops waiting for it and reports a timeout to the LLM.
+    """
+
+    def __init__(self, tools, max_workers: int = 8, default_timeout: float = 30.0, timeouts=None):
+        self.tools = {t.name: t for t in tools}
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def __getitem__(self, name: str):
+        return self.tools[name]
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    async def arun(self, tool_call) -> ToolMessage:
+        """Run a single tool call and wrap its output (or error) in a ToolMessage."""
+        name = tool_call["name"]
+        tool = self.tools.get(name)
+        if tool is None:
+            return ToolMessage(content=f"Error: unknown tool '{name}'",
+                               tool_call_id=tool_call["id"], status="error")
+
+        if getattr(tool, "coroutine", None) is not None:
+            pending = tool.ainvoke(tool_call["args"])
+        else:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(self._pool, tool.invoke, tool_call["args"])
+
+        try:
+            output = await asyncio.wait_for(pending, timeout=self.timeout_for(name))
+        except asyncio.TimeoutError:
+            return ToolMessage(content=f"Error: {name} timed out after {self.timeout_for(name)}s",
+                               tool_call_id=tool_call["id"], status="error")
+        except Exception as e:
+            return ToolMessage(content=f"Error: {str(e)}",
+                               tool_call_id=tool_call["id"], status="error")
+        return ToolMessage(content=str(output), tool_call_id=tool_call["id"])
+
+    async def aexecute(self, tool_calls) -> list[ToolMessage]:
+        """Run all tool calls from one LLM turn at once; results keep the call order."""
+        return list(await asyncio.gather(*(self.arun(tc) for tc in tool_calls)))
+
+    def execute(self, tool_calls) -> list[ToolMessage]:
+        """Sync entry point for scripts that are not already inside an event loop."""
+        return asyncio.run(self.aexecute(tool_calls))
+
+
+class ToolCache:
+    """LRU cache of one tool's results, keyed by its canonicalized arguments.
+
+    `ttl` (seconds) is for semi-pure tools whose answer may change over time;
+    None means entries only leave the cache when the LRU bound evicts them.
+    Exceptions are never cached.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kwargs) -> str:
+        # Same arguments in any order give the same key
+        return json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# One cache per pure tool, shared across agent iterations and requests
+TOOL_CACHES: dict[str, ToolCache] = {}
+
+
+def pure_tool(maxsize: int = 256, ttl: float | None = None):
+    """Mark a @tool as pure so repeated calls with the same arguments are cached.
+
+    Opt-in: put it above @tool.
+
+        @pure_tool(maxsize=1024)
+        @tool
+        def get_word_length(word: str) -> int:
+            ...
+    """
+
+    def decorator(tool):
+        cache = ToolCache(maxsize=maxsize, ttl=ttl)
+        TOOL_CACHES[tool.name] = cache
+        update = {"metadata": {**(tool.metadata or {}), "pure": True}}
+
+        def call_key(target, args, kwargs) -> str:
+            # Positional or keyword, defaults filled in: one key per actual call
+            bound = inspect.signature(target).bind(*args, **kwargs)
+            bound.apply_defaults()
+            return ToolCache.key(bound.arguments)
+
+        if tool.func is not None:
+            func = tool.func
+
+            def cached_func(*args, **kwargs):
+                key = call_key(func, args, kwargs)
+                hit, value = cache.get(key)
+                if hit:
+                    return value
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+                return value
+
+            update["func"] = cached_func
+
+        if getattr(tool, "coroutine", None) is not None:
+            coroutine = tool.coroutine
+
+            async def cached_coroutine(*args, **kwargs):
+                key = call_key(coroutine, args, kwargs)
+                hit, value = cache.get(key)
+                if hit:
+                    return value
+                value = await coroutine(*args, **kwargs)
+                cache.put(key, value)
+                return value
+
+            update["coroutine"] = cached_coroutine
+
+        return tool.model_copy(update=update)
+
+    return decorator
+
+
+def cache_stats() -> dict[str, dict]:
+    """Per-tool hit statistics for every tool marked with @pure_tool."""
+    return {name: cache.stats() for name, cache in TOOL_CACHES.items()}
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
@@ -8,6 +9,10 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 
+# Reuse the reranking retriever from Module 4
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "04_rag"))
+from reranking import RerankingRetriever
+
 # Load environment variables
 load_dotenv()
 
@@ -29,7 +34,7 @@ splits = text_splitter.split_documents(documents)
 print("Creating vector store...")
 embeddings = OpenAIEmbeddings(base_url=base_url)
 vectorstore = FAISS.from_documents(splits, embeddings)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+retriever = RerankingRetriever(vectorstore=vectorstore, k=2, fetch_k=50)
 
 # Create RAG prompt
 template = """Answer the question based on the following context. 
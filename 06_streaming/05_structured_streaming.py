@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import asyncio
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from stream_parsers import LineListParser, StreamingJsonParser
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 6: Streaming Structured Output ===\n")
+print("StrOutputParser streams text, so structured consumers wait for the")
+print("whole answer. These parsers hand over each field or line as it closes.\n")
+
+# Setup
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+llm = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
+
+print("=" * 60)
+print("1. JSON fields as soon as they close")
+print("=" * 60)
+
+json_prompt = ChatPromptTemplate.from_template(
+    'Reply with JSON only: {{"title": "...", "key_points": ["...", "...", "..."]}} '
+    "summarizing {topic}."
+)
+# depth=1 would yield "title" and then the whole "key_points" list;
+# depth=2 yields each key point as soon as its closing quote arrives
+json_chain = json_prompt | llm | StreamingJsonParser(depth=2)
+
+start = time.perf_counter()
+try:
+    for path, value in json_chain.stream({"topic": "LangChain Expression Language"}):
+        print(f"  +{(time.perf_counter() - start) * 1000:6.0f}ms  {path}: {value}")
+except Exception as e:
+    print(f"  (the model did not answer with JSON: {e})")
+
+print("\n" + "=" * 60)
+print("2. Start retrieving for each generated query while the rest is written")
+print("=" * 60)
+
+loader = TextLoader("04_rag/sample_docs.txt", encoding="utf-8")
+splits = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50).split_documents(loader.load())
+retriever = FAISS.from_documents(splits, OpenAIEmbeddings(base_url=base_url)).as_retriever(search_kwargs={"k": 2})
+
+# The same kind of prompt MultiQueryRetriever uses: one query per line
+query_prompt = ChatPromptTemplate.from_template(
+    "Write 3 different search queries for this question, one per line, no numbering:\n{question}"
+)
+query_chain = query_prompt | llm | LineListParser()
+
+
+async def multi_query(question: str):
+    start = time.perf_counter()
+    searches = []
+    async for query in query_chain.astream({"question": question}):
+        print(f"  +{(time.perf_counter() - start) * 1000:6.0f}ms  query ready, searching: {query}")
+        searches.append(asyncio.create_task(retriever.ainvoke(query)))
+    results = await asyncio.gather(*searches)
+    unique = {doc.page_content: doc for docs in results for doc in docs}
+    print(f"  +{(time.perf_counter() - start) * 1000:6.0f}ms  {len(unique)} unique chunks from {len(searches)} queries")
+
+
+asyncio.run(multi_query("What are the benefits of LangChain?"))
+
+print("\n" + "=" * 60)
+print("3. Parsing cost as the output grows (no model call)")
+print("=" * 60)
+# A long JSON answer arriving in 4-character chunks, like model tokens.
+# JsonOutputParser re-parses everything received so far on every chunk.
+print(f"{'chars':>8}{'JsonOutputParser':>20}{'StreamingJsonParser':>22}")
+for n in (50, 100, 200, 400):
+    text = json.dumps({"key_points": [f"point number {i} about something interesting" for i in range(n)]})
+    chunks = [text[i : i + 4] for i in range(0, len(text), 4)]
+
+    t = time.perf_counter()
+    list(JsonOutputParser().transform(iter(chunks)))
+    cumulative = time.perf_counter() - t
+
+    t = time.perf_counter()
+    list(StreamingJsonParser(depth=2).transform(iter(chunks)))
+    incremental = time.perf_counter() - t
+    print(f"{len(text):>8}{cumulative * 1000:>18.1f}ms{incremental * 1000:>20.1f}ms")
+
+print("\nDoubling the output doubles the incremental parser's work,")
+print("but roughly quadruples the cumulative parser's.")
@@ -0,0 +1,279 @@
+"""Output parsers that hand out structured results while the model is still typing.
+
+Import from a script in this folder, e.g. `from stream_parsers import StreamingJsonParser`.
+
+    chain = prompt | llm | StreamingJsonParser(depth=2)
+    for path, value in chain.stream(...):     # ("key_points", 0), "..."
+        ...
+
+    chain = prompt | llm | LineListParser()
+    for line in chain.stream(...):            # one query per line, as each line ends
+        ...
+
+StrOutputParser hands over text, so anything structured has to wait for
+the whole answer. LangChain's JsonOutputParser can stream, but it re-parses
+the whole buffer on every chunk: O(n^2) work for an n-character answer.
+
+These parsers look at each character once. They keep only the state of
+the token currently being read, so the total cost is O(n). Each value is
+yielded as soon as it is complete. `invoke()` still returns the full
+result: the parsed object, or the list of lines.
+"""
+import json
+import re
+from typing import Any, AsyncIterator, Iterator, Optional
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import BaseTransformOutputParser
+
+_STRING_BODY = re.compile(r'[^"\\]*')
+_SCALAR_BODY = re.compile(r"[-+0-9.eEa-zA-Z]*")
+_START = re.compile(r"[{\[]")
+_SURROGATE = re.compile("[\ud800-\udfff]")
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONParser:
+    """Push-style JSON parser: feed() text pieces, get back completed values.
+
+    Returns (path, value) pairs for every value that completes at `depth`
+    levels of nesting: depth=1 gives the top-level fields (or array items),
+    depth=2 the items inside those, and so on. Text before the first { or [
+    (prose, a ```json fence) and anything after the closing bracket is ignored.
+    Inside, the structure is checked as it arrives: a missing or extra comma,
+    colon or key raises OutputParserException, so retry/fix wrappers still fire.
+    """
+
+    def __init__(self, depth: int = 1):
+        self.depth = depth
+        self.result: Any = None
+        self.done = False
+        self._stack: list[list] = []     # [container, pending dict key, path, expected next token]
+        self._mode = "seek"              # seek | value | string | escape | unicode | scalar | done
+        self._parts: list[str] = []      # pieces of the string or scalar being read
+        self._hex = ""
+
+    def feed(self, text: str) -> list[tuple[tuple, Any]]:
+        events: list[tuple[tuple, Any]] = []
+        i, n = 0, len(text)
+        while i < n:
+            mode = self._mode
+            if mode == "string":
+                # Jump straight to the next quote or backslash
+                end = _STRING_BODY.match(text, i).end()
+                self._parts.append(text[i:end])
+                i = end
+                if i < n:
+                    if text[i] == '"':
+                        self._end_string(events)
+                    else:
+                        self._mode = "escape"
+                    i += 1
+            elif mode == "escape":
+                if text[i] == "u":
+                    self._mode, self._hex = "unicode", ""
+                elif text[i] in _ESCAPES:
+                    self._parts.append(_ESCAPES[text[i]])
+                    self._mode = "string"
+                else:
+                    raise OutputParserException(f"Invalid escape '\\{text[i]}' in JSON output")
+                i += 1
+            elif mode == "unicode":
+                take = text[i : i + 4 - len(self._hex)]
+                self._hex += take
+                i += len(take)
+                if len(self._hex) == 4:
+                    if not _HEX4.fullmatch(self._hex):
+                        raise OutputParserException(f"Invalid escape '\\u{self._hex}' in JSON output")
+                    self._parts.append(chr(int(self._hex, 16)))
+                    self._mode = "string"
+            elif mode == "scalar":
+                end = _SCALAR_BODY.match(text, i).end()
+                self._parts.append(text[i:end])
+                i = end
+                if i < n:                     # a delimiter ends the scalar; it is read next
+                    self._end_scalar(events)
+            elif mode == "seek":
+                start = _START.search(text, i)
+                if start is None:
+                    break
+                i, self._mode = start.start(), "value"
+            elif mode == "done":
+                break
+            else:
+                c = text[i]
+                i += 1
+                if c in " \t\r\n":
+                    continue
+                # Each frame expects one of: "first" (just opened), "key", "colon",
+                # "value" or "comma" (a comma or the closing bracket)
+                frame = self._stack[-1] if self._stack else None
+                expect = frame[3] if frame else "value"
+                in_dict = frame is not None and isinstance(frame[0], dict)
+                if c == ",":
+                    if expect != "comma":
+                        self._unexpected(c)
+                    frame[3] = "key" if in_dict else "value"
+                elif c == ":":
+                    if expect != "colon":
+                        self._unexpected(c)
+                    frame[3] = "value"
+                elif c == "}" or c == "]":
+                    if expect not in ("first", "comma") or in_dict != (c == "}"):
+                        self._unexpected(c)
+                    self._stack.pop()
+                    self._add(frame[0], events)
+                elif in_dict and expect in ("first", "key"):
+                    if c != '"':
+                        self._unexpected(c)   # object keys must be strings
+                    self._mode, self._parts = "string", []
+                elif expect != "value" and not (expect == "first" and not in_dict):
+                    self._unexpected(c)
+                elif c == "{" or c == "[":
+                    self._push({} if c == "{" else [])
+                elif c == '"':
+                    self._mode, self._parts = "string", []
+                else:
+                    self._mode, self._parts = "scalar", [c]
+        return events
+
+    def close(self) -> list[tuple[tuple, Any]]:
+        """Signal the end of the text; returns any last values."""
+        events: list[tuple[tuple, Any]] = []
+        if self._mode == "scalar":
+            self._end_scalar(events)
+        if not self.done:
+            raise OutputParserException("Model output ended before the JSON value was complete")
+        return events
+
+    # --- internals ----------------------------------------------------------
+
+    @staticmethod
+    def _unexpected(c: str) -> None:
+        raise OutputParserException(f"Unexpected {c!r} in JSON output")
+
+    def _path_for_next(self) -> tuple:
+        parent, key, path, _ = self._stack[-1]
+        return path + (key if isinstance(parent, dict) else len(parent),)
+
+    def _push(self, container) -> None:
+        path = self._path_for_next() if self._stack else ()
+        self._stack.append([container, None, path, "first"])
+
+    def _add(self, value, events) -> None:
+        self._mode = "value"
+        if not self._stack:
+            self.result, self.done, self._mode = value, True, "done"
+            if self.depth == 0:
+                events.append(((), value))
+            return
+        path = self._path_for_next()
+        frame = self._stack[-1]
+        if isinstance(frame[0], dict):
+            frame[0][frame[1]] = value
+            frame[1] = None
+        else:
+            frame[0].append(value)
+        frame[3] = "comma"
+        if len(self._stack) == self.depth:
+            events.append((path, value))
+
+    def _end_string(self, events) -> None:
+        value = "".join(self._parts)
+        if _SURROGATE.search(value):
+            # \uXXXX surrogate pairs arrive as two halves; join them
+            value = value.encode("utf-16", "surrogatepass").decode("utf-16", "surrogatepass")
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and isinstance(frame[0], dict) and frame[3] in ("first", "key"):
+            frame[1], frame[3] = value, "colon"   # a key, not a value
+            self._mode = "value"
+        else:
+            self._add(value, events)
+
+    def _end_scalar(self, events) -> None:
+        token = "".join(self._parts)
+        try:
+            value = json.loads(token)
+        except ValueError:
+            raise OutputParserException(f"Invalid JSON value {token!r} in model output") from None
+        self._add(value, events)
+
+
+class StreamingJsonParser(BaseTransformOutputParser[Any]):
+    """Streams (path, value) pairs for values at `depth`; invoke() returns the object."""
+
+    depth: int = 1
+
+    @property
+    def _type(self) -> str:
+        return "streaming_json"
+
+    def parse(self, text: str) -> Any:
+        parser = IncrementalJSONParser(self.depth)
+        parser.feed(text)
+        parser.close()
+        return parser.result
+
+    def _transform(self, input: Iterator[str | BaseMessage]) -> Iterator[tuple[tuple, Any]]:
+        parser = IncrementalJSONParser(self.depth)
+        for chunk in input:
+            yield from parser.feed(chunk.content if isinstance(chunk, BaseMessage) else chunk)
+        yield from parser.close()
+
+    async def _atransform(self, input: AsyncIterator[str | BaseMessage]) -> AsyncIterator[tuple[tuple, Any]]:
+        parser = IncrementalJSONParser(self.depth)
+        async for chunk in input:
+            for event in parser.feed(chunk.content if isinstance(chunk, BaseMessage) else chunk):
+                yield event
+        for event in parser.close():
+            yield event
+
+
+class LineListParser(BaseTransformOutputParser[Any]):
+    """One item per non-empty line, streamed as each line ends.
+
+    Drop-in for MultiQueryRetriever's line parser: invoke() returns the list
+    of lines. `strip_numbering` removes "1. " / "- " style list markers.
+    """
+
+    strip_numbering: bool = True
+
+    @property
+    def _type(self) -> str:
+        return "line_list"
+
+    def _clean(self, line: str) -> Optional[str]:
+        line = line.strip()
+        if self.strip_numbering:
+            line = re.sub(r"^(\d+[.)]|[-*•])\s+", "", line)
+        return line or None
+
+    def parse(self, text: str) -> list[str]:
+        return [line for line in map(self._clean, text.split("\n")) if line]
+
+    def _lines(self, pending: list[str], text: str) -> list[str]:
+        if "\n" not in text:
+            pending.append(text)          # still inside a line: no re-splitting
+            return []
+        first, *middle, last = text.split("\n")
+        complete = ["".join(pending) + first, *middle]
+        pending[:] = [last]
+        return [line for line in map(self._clean, complete) if line]
+
+    def _transform(self, input: Iterator[str | BaseMessage]) -> Iterator[str]:
+        pending: list[str] = []
+        for chunk in input:
+            yield from self._lines(pending, chunk.content if isinstance(chunk, BaseMessage) else chunk)
+        last = self._clean("".join(pending))
+        if last:
+            yield last
+
+    async def _atransform(self, input: AsyncIterator[str | BaseMessage]) -> AsyncIterator[str]:
+        pending: list[str] = []
+        async for chunk in input:
+            for line in self._lines(pending, chunk.content if isinstance(chunk, BaseMessage) else chunk):
+                yield line
+        last = self._clean("".join(pending))
+        if last:
+            yield last
@@ -0,0 +1,91 @@
+import os
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
+from langchain_core.tools import tool
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from tracing import TraceRecorder
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 8: Tracing Chains and Agents ===\n")
+print("verbose=True only prints text. A tracer callback records a timed")
+print("span for every step, so we can see where the time goes.\n")
+
+# 1. Setup Model
+# streaming=True makes invoke() stream internally, so the tracer sees the
+# first token and can report time-to-first-token (TTFT)
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+llm = ChatOpenAI(
+    model=model_name,
+    base_url=base_url,
+    temperature=0,
+    streaming=True,
+    stream_usage=True,
+)
+
+tracer = TraceRecorder()
+
+# 2. Trace an LCEL Chain (same as 02_chains/01_simple_chain.py)
+print("=" * 60)
+print("Tracing: prompt | model | StrOutputParser")
+print("=" * 60)
+
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic}")
+chain = prompt | llm | StrOutputParser()
+
+# Callbacks go in the config; every runnable in the chain reports to them
+response = chain.invoke({"topic": "Space Exploration"}, config={"callbacks": [tracer]})
+print(f"\nAnswer: {response}\n")
+
+# 3. Trace an Agent (same as 05_agents/02_tool_calling_agent.py)
+print("=" * 60)
+print("Tracing: AgentExecutor with tools")
+print("=" * 60)
+
+@tool
+def get_word_length(word: str) -> int:
+    """Returns the length of a word. Input should be a single word."""
+    return len(word)
+
+@tool
+def reverse_string(text: str) -> str:
+    """Reverses a string. Input should be any text."""
+    return text[::-1]
+
+@tool
+def count_vowels(text: str) -> int:
+    """Counts the number of vowels in a text. Input should be any text."""
+    vowels = "aeiouAEIOU"
+    return sum(1 for char in text if char in vowels)
+
+tools = [get_word_length, reverse_string, count_vowels]
+
+agent_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant that can use tools to answer questions about text."),
+    ("human", "{input}"),
+    ("placeholder", "{agent_scratchpad}")
+])
+agent = create_tool_calling_agent(llm, tools, agent_prompt)
+agent_executor = AgentExecutor(agent=agent, tools=tools, max_iterations=3)
+
+result = agent_executor.invoke(
+    {"input": "For the word 'LangChain', tell me its length, reverse it, and count the vowels."},
+    config={"callbacks": [tracer]},
+)
+print(f"\nFinal Answer: {result['output']}\n")
+
+# 4. Inspect and Export
+print("=" * 60)
+print("Spans")
+print("=" * 60)
+print(tracer.summary())
+
+trace_dir = os.getenv("TRACE_DIR", "traces")
+tracer.export_chrome_trace(os.path.join(trace_dir, "trace.json"))
+tracer.export_jsonl(os.path.join(trace_dir, "spans.jsonl"))
+print(f"\nWrote {trace_dir}/trace.json (open in chrome://tracing or ui.perfetto.dev)")
+print(f"Wrote {trace_dir}/spans.jsonl (one span per line)")
@@ -0,0 +1,67 @@
+import os
+import time
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
+from metrics import MetricsCallbackHandler, MeteredCache
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 8: Per-stage Metrics (Prometheus format) ===\n")
+
+# 1. Metrics Callback
+# One handler aggregates every run it sees: latency histograms (p50/p90/p99),
+# throughput, errors and in-flight runs, keyed by runnable name.
+metrics = MetricsCallbackHandler()
+
+# The LLM cache is wrapped so its hit rate shows up next to the latencies
+set_llm_cache(MeteredCache(InMemoryCache(), metrics))
+
+# 2. Expose /metrics for Prometheus to scrape
+port = int(os.getenv("METRICS_PORT", "8000"))
+server = metrics.serve(port=port)
+print(f"Serving metrics at http://127.0.0.1:{port}/metrics\n")
+
+# 3. Chain (same as 02_chains/01_simple_chain.py)
+base_url = os.getenv("OPENAI_BASE_URL")
+model_name = os.getenv("OPENAI_MODEL_NAME")
+model = ChatOpenAI(model=model_name, base_url=base_url, temperature=0)
+
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic}")
+chain = prompt | model | StrOutputParser()
+
+# 4. Generate some traffic
+# Topics repeat on purpose: the second request for a topic is a cache hit
+topics = ["Space Exploration", "Octopuses", "Volcanoes", "Space Exploration", "Octopuses"]
+
+# Passing the handler as a constructor-level callback would only see the
+# model; passing it in the config lets every stage of the chain report.
+for topic in topics:
+    start = time.perf_counter()
+    try:
+        chain.invoke({"topic": topic}, config={"callbacks": [metrics]})
+        print(f"✓ {topic:<20} {time.perf_counter() - start:6.2f}s")
+    except Exception as e:
+        print(f"✗ {topic:<20} {e}")
+
+# 5. Show what Prometheus would scrape
+print("\n" + "=" * 60)
+print("p50 / p90 / p99 per stage")
+print("=" * 60)
+for name, stats in sorted(metrics.stages.items()):
+    p50, p90, p99 = (stats.latency.quantile(q) * 1000 for q in (0.5, 0.9, 0.99))
+    print(f"{name:<22} runs={stats.requests:<3} errors={stats.errors:<2} "
+          f"p50={p50:8.1f}ms p90={p90:8.1f}ms p99={p99:8.1f}ms")
+
+textfile = os.getenv("METRICS_TEXTFILE", "metrics.prom")
+metrics.write_textfile(textfile)
+print(f"\nAlso wrote {textfile} (for node_exporter's textfile collector)")
+
+print("\nFirst lines of /metrics:")
+print("\n".join(metrics.render_prometheus().splitlines()[:8]))
+
+server.shutdown()
@@ -0,0 +1,181 @@
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from openai import OpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.document_loaders import TextLoader
+from langchain_community.vectorstores import FAISS
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from fake_llm_server import FakeLLMServer
+
+print("=== Module 8: Streaming Latency Benchmark ===\n")
+print("Measures what the LCEL layers add on top of the raw model stream,")
+print("against a deterministic local stand-in server (no API key needed).\n")
+
+# 1. Options
+parser = argparse.ArgumentParser(description="TTFT / inter-token latency benchmark for streaming.")
+parser.add_argument("--runs", type=int, default=20, help="streams per scenario")
+parser.add_argument("--concurrency", type=int, default=8, help="parallel astream() calls")
+parser.add_argument("--tokens", type=int, default=60, help="tokens per response")
+parser.add_argument("--ttft-ms", type=float, default=50, help="server time to first token")
+parser.add_argument("--inter-token-ms", type=float, default=5, help="server delay between tokens")
+parser.add_argument("--json", help="also write the results to this file")
+args = parser.parse_args()
+
+
+# 2. Measurement helpers
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _record(start: float, cpu_start: float, arrivals: list[float]) -> dict:
+    end = time.perf_counter()
+    return {
+        "ttft": arrivals[0] - start if arrivals else None,
+        "gaps": [b - a for a, b in zip(arrivals, arrivals[1:])],
+        "total": end - start,
+        "chunks": len(arrivals),
+        "cpu": time.process_time() - cpu_start,
+    }
+
+
+def measure(stream) -> dict:
+    """Time one stream: when each non-empty chunk arrived, and CPU used meanwhile."""
+    start, cpu_start = time.perf_counter(), time.process_time()
+    arrivals = []
+    for chunk in stream:
+        text = chunk if isinstance(chunk, str) else getattr(chunk, "content", None)
+        if text is None and getattr(chunk, "choices", None):
+            text = chunk.choices[0].delta.content
+        if text:
+            arrivals.append(time.perf_counter())
+    return _record(start, cpu_start, arrivals)
+
+
+async def ameasure(stream) -> dict:
+    start, cpu_start = time.perf_counter(), time.process_time()
+    arrivals = []
+    async for chunk in stream:
+        if chunk:
+            arrivals.append(time.perf_counter())
+    return _record(start, cpu_start, arrivals)
+
+
+def summarize(name: str, runs: list[dict], wall: float = None, cpu: float = None) -> dict:
+    ttfts = [r["ttft"] for r in runs if r["ttft"] is not None]
+    gaps = [g for r in runs for g in r["gaps"]]
+    chunks = sum(r["chunks"] for r in runs)
+    # Concurrent runs overlap, so their CPU and wall time are measured around the whole batch
+    wall = wall if wall is not None else sum(r["total"] for r in runs)
+    cpu = cpu if cpu is not None else sum(r["cpu"] for r in runs)
+    return {
+        "scenario": name,
+        "runs": len(runs),
+        "ttft_p50_ms": statistics.median(ttfts) * 1000 if ttfts else 0.0,
+        "ttft_p99_ms": percentile(ttfts, 0.99) * 1000,
+        "itl_p50_ms": percentile(gaps, 0.50) * 1000,
+        "itl_p90_ms": percentile(gaps, 0.90) * 1000,
+        "itl_p99_ms": percentile(gaps, 0.99) * 1000,
+        "total_p50_ms": statistics.median(r["total"] for r in runs) * 1000,
+        "chunks_per_s": chunks / wall if wall else 0.0,
+        "cpu_us_per_chunk": cpu / chunks * 1e6 if chunks else 0.0,
+    }
+
+
+# 3. Start the stand-in server in its own process
+# A separate process keeps the server's CPU out of our measurements.
+profile = {"ttft": args.ttft_ms / 1000, "inter_token": args.inter_token_ms / 1000, "tokens": args.tokens}
+server = FakeLLMServer(models={"fake-model": profile}, in_process=False).start()
+print(f"Stand-in server: {server.base_url}")
+
+raw_client = OpenAI(base_url=server.base_url, api_key="fake")
+llm = ChatOpenAI(model="fake-model", base_url=server.base_url, api_key="fake", temperature=0)
+
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic}")
+chain = prompt | llm | StrOutputParser()
+
+# Streaming RAG chain (same shape as 06_streaming/03_streaming_rag.py)
+documents = TextLoader("04_rag/sample_docs.txt", encoding="utf-8").load()
+splits = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50).split_documents(documents)
+embeddings = OpenAIEmbeddings(base_url=server.base_url, api_key="fake", check_embedding_ctx_length=False)
+retriever = FAISS.from_documents(splits, embeddings).as_retriever(search_kwargs={"k": 2})
+rag_prompt = ChatPromptTemplate.from_template(
+    "Answer the question based on the following context.\n\nContext:\n{context}\n\nQuestion: {question}\n\nAnswer:"
+)
+
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+rag_chain = (
+    {"context": retriever | format_docs, "question": RunnablePassthrough()}
+    | rag_prompt
+    | llm
+    | StrOutputParser()
+)
+
+# 4. Scenarios
+results = []
+
+def raw_stream():
+    return raw_client.chat.completions.create(
+        model="fake-model",
+        messages=[{"role": "user", "content": "Tell me a short fact about space"}],
+        stream=True,
+    )
+
+scenarios = [
+    ("raw openai client", raw_stream),
+    ("llm.stream", lambda: llm.stream("Tell me a short fact about space")),
+    ("chain.stream (+parser)", lambda: chain.stream({"topic": "space"})),
+    ("rag_chain.stream", lambda: rag_chain.stream("What is LCEL?")),
+]
+
+for name, make_stream in scenarios:
+    measure(make_stream())  # warm-up: connection setup, imports, caches
+    runs = [measure(make_stream()) for _ in range(args.runs)]
+    results.append(summarize(name, runs))
+    print(f"✓ {name}")
+
+
+async def concurrent_astream(n: int):
+    # Warm-up, then n streams at once
+    await ameasure(chain.astream({"topic": "space"}))
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    runs = await asyncio.gather(*(ameasure(chain.astream({"topic": f"topic {i}"})) for i in range(n)))
+    return list(runs), time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+runs, wall, cpu = asyncio.run(concurrent_astream(args.concurrency))
+results.append(summarize(f"chain.astream x{args.concurrency}", runs, wall=wall, cpu=cpu))
+print(f"✓ chain.astream x{args.concurrency}")
+
+server.stop()
+
+# 5. Report
+print("\n" + "=" * 100)
+print(f"Server profile: ttft={args.ttft_ms}ms, inter-token={args.inter_token_ms}ms, tokens={args.tokens}")
+print("=" * 100)
+header = f"{'scenario':<24} {'ttft p50':>9} {'ttft p99':>9} {'itl p50':>8} {'itl p90':>8} {'itl p99':>8} {'total p50':>10} {'chunks/s':>9} {'cpu/chunk':>10}"
+print(header)
+for r in results:
+    print(f"{r['scenario']:<24} {r['ttft_p50_ms']:>7.1f}ms {r['ttft_p99_ms']:>7.1f}ms "
+          f"{r['itl_p50_ms']:>6.2f}ms {r['itl_p90_ms']:>6.2f}ms {r['itl_p99_ms']:>6.2f}ms "
+          f"{r['total_p50_ms']:>8.1f}ms {r['chunks_per_s']:>9.0f} {r['cpu_us_per_chunk']:>8.0f}us")
+
+baseline = results[0]
+print("\nOverhead vs. raw client (p50 TTFT / CPU per chunk):")
+for r in results[1:4]:
+    print(f"  {r['scenario']:<24} +{r['ttft_p50_ms'] - baseline['ttft_p50_ms']:6.1f}ms  "
+          f"+{r['cpu_us_per_chunk'] - baseline['cpu_us_per_chunk']:6.0f}us")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "results": results}, f, indent=2)
+    print(f"\nWrote {args.json}")
@@ -0,0 +1,83 @@
+import os
+import sys
+from dotenv import load_dotenv
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from model_catalog import ModelCatalog, ModelRouter
+from fake_llm_server import FakeLLMServer
+
+# Load environment variables
+load_dotenv()
+
+print("=== Module 8: Fastest-Model Routing ===\n")
+print("Free-tier latency swings a lot. Instead of one hard-wired")
+print("OPENAI_MODEL_NAME, probe a pool of models and route each request")
+print("to the fastest healthy one, failing over when it errors.\n")
+
+# 1. Choose the backend
+# By default this runs against the local stand-in server with three scripted
+# models. Pass --live to use OPENAI_BASE_URL and the MODEL_POOL env variable.
+live = "--live" in sys.argv
+server = None
+if live:
+    base_url = os.getenv("OPENAI_BASE_URL")
+    api_key = os.getenv("OPENAI_API_KEY")
+    pool = [m.strip() for m in os.getenv("MODEL_POOL", os.getenv("OPENAI_MODEL_NAME", "")).split(",") if m.strip()]
+else:
+    server = FakeLLMServer(models={
+        "slow-model": {"ttft": 0.40, "inter_token": 0.02, "tokens": 20},
+        "fast-model": {"ttft": 0.05, "inter_token": 0.005, "tokens": 20},
+        "down-model": {"status": 503},
+    }).start()
+    base_url, api_key = server.base_url, "fake"
+    pool = ["down-model", "slow-model", "fast-model"]
+
+# 2. Model Catalog (cached on disk, conditionally refreshed)
+print("=" * 60)
+print("Model Catalog")
+print("=" * 60)
+cache_path = os.path.join(".cache", "models-live.json" if live else "models-fake.json")
+catalog = ModelCatalog(base_url, api_key=api_key, cache_path=cache_path, max_age=0 if not live else 3600)
+available = set(catalog.model_ids())
+print(f"{len(available)} models listed (cache: {cache_path})")
+# max_age=0 forces revalidation; the second call is answered with a 304
+catalog.list_models()
+print("Re-checked the list: unchanged lists cost a 304, not a full download")
+
+missing = [m for m in pool if m not in available]
+if missing:
+    print(f"⚠️  Not in the catalog, dropped from the pool: {missing}")
+pool = [m for m in pool if m in available]
+
+# 3. Probe the pool
+print("\n" + "=" * 60)
+print("Probing TTFT and throughput")
+print("=" * 60)
+router = ModelRouter(base_url, pool, api_key=api_key)
+router.probe_all()
+router.start(interval=int(os.getenv("MODEL_PROBE_INTERVAL", "300")))
+
+for model in router.ranked():
+    h = router.health[model]
+    if h.healthy and h.ttft is not None:
+        rate = f"{h.tokens_per_s:.0f} tok/s" if h.tokens_per_s else "-"
+        print(f"✓ {model:<20} ttft={h.ttft * 1000:7.1f}ms  {rate}")
+    else:
+        print(f"✗ {model:<20} unhealthy ({h.last_error})")
+
+# 4. Use the routed model in a normal chain
+print("\n" + "=" * 60)
+print(f"Routing requests (fastest first: {router.ranked()[0]})")
+print("=" * 60)
+llm = router.chat_model(temperature=0)
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic}")
+chain = prompt | llm | StrOutputParser()
+
+print("\nStreaming answer:")
+for chunk in chain.stream({"topic": "Space Exploration"}):
+    print(chunk, end="", flush=True)
+print()
+
+router.stop()
+if server:
+    server.stop()
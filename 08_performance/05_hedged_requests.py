@@ -0,0 +1,82 @@
+import time
+import asyncio
+import argparse
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from hedging import HedgedChatModel
+from fake_llm_server import FakeLLMServer
+
+print("=== Module 8: Hedged Requests ===\n")
+print("One stalled provider response sets the latency of the whole request.")
+print("Hedging sends a backup request once the first token is late and keeps")
+print("whichever answers first.\n")
+
+parser = argparse.ArgumentParser(description="Compare tail latency with and without hedging.")
+parser.add_argument("--requests", type=int, default=100)
+parser.add_argument("--stall-every", type=int, default=25, help="every Nth request stalls")
+parser.add_argument("--stall-seconds", type=float, default=1.5)
+args = parser.parse_args()
+
+# 1. A stand-in provider that occasionally stalls before the first token
+server = FakeLLMServer(models={
+    "stally-model": {
+        "ttft": 0.05,
+        "inter_token": 0.002,
+        "tokens": 20,
+        "stall_every": args.stall_every,
+        "stall_seconds": args.stall_seconds,
+    },
+}).start()
+
+llm = ChatOpenAI(model="stally-model", base_url=server.base_url, api_key="fake", temperature=0)
+
+# 2. Wrap it: the backup goes to the same model here; pass a different
+# ChatOpenAI as `backup` to hedge onto a fallback model instead.
+hedged_llm = HedgedChatModel(primary=llm, min_samples=10, initial_delay=0.5)
+
+prompt = ChatPromptTemplate.from_template("Tell me a short fact about {topic}")
+plain_chain = prompt | llm | StrOutputParser()
+hedged_chain = prompt | hedged_llm | StrOutputParser()
+
+
+async def time_to_first_token(chain) -> float:
+    start = time.perf_counter()
+    first = None
+    async for _ in chain.astream({"topic": "space"}):
+        if first is None:
+            first = time.perf_counter() - start
+    return first
+
+
+async def run(chain, n: int) -> list[float]:
+    return [await time_to_first_token(chain) for _ in range(n)]
+
+
+def report(name: str, ttfts: list[float]) -> None:
+    ordered = sorted(ttfts)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    print(f"{name:<10} p50={pick(0.50):7.1f}ms  p95={pick(0.95):7.1f}ms  "
+          f"p99={pick(0.99):7.1f}ms  max={ordered[-1] * 1000:7.1f}ms")
+
+
+# 3. Compare
+print(f"Every {args.stall_every}th request stalls for {args.stall_seconds}s before its first token.\n")
+plain = asyncio.run(run(plain_chain, args.requests))
+hedged = asyncio.run(run(hedged_chain, args.requests))
+
+print("=" * 60)
+print("Time to first token")
+print("=" * 60)
+report("plain", plain)
+report("hedged", hedged)
+
+stats = hedged_llm.stats()
+print(f"\nHedged {stats['hedges']} of {stats['requests']} requests "
+      f"(backup won {stats['backup_wins']}), current hedge delay {stats['hedge_delay_ms']}ms")
+print(f"Budget: at most {hedged_llm.max_hedge_ratio:.0%} of requests (+{hedged_llm.burst} burst)")
+
+# Sync calls work too: the race runs on a background event loop
+print(f"\ninvoke(): {hedged_chain.invoke({'topic': 'space'})[:60]}...")
+
+server.stop()
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import faiss
+
+# The index selection lives with the RAG code in 04_rag
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "04_rag"))
+from vector_index import build_index, choose_index, recall_at_k, search_params
+
+print("=== Module 8: Vector Index Benchmark ===\n")
+print("A flat index compares every query with every chunk, so search time")
+print("grows with the corpus. HNSW and IVF trade a little recall for speed.\n")
+
+# 1. Options
+parser = argparse.ArgumentParser(description="recall@k and QPS of flat / HNSW / IVF on synthetic corpora.")
+parser.add_argument("--sizes", default="10000,100000", help="comma-separated corpus sizes")
+parser.add_argument("--dim", type=int, default=128, help="vector dimension (OpenAI embeddings: 1536)")
+parser.add_argument("--queries", type=int, default=500)
+parser.add_argument("-k", type=int, default=10)
+parser.add_argument("--target-recall", type=float, default=0.95)
+parser.add_argument("--json", help="also write the results to this file")
+args = parser.parse_args()
+
+
+# 2. Synthetic corpus: clustered like real embeddings (topics), not uniform noise
+def make_corpus(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 500), dim)).astype(np.float32)
+    labels = rng.integers(len(centers), size=n + args.queries)
+    points = centers[labels] + 0.3 * rng.standard_normal((n + args.queries, dim)).astype(np.float32)
+    return points[:n], points[n:]
+
+
+def measure(index, queries, truth, params=None) -> dict:
+    # One query at a time, the way a retriever searches
+    start = time.perf_counter()
+    found = np.empty_like(truth)
+    for i, query in enumerate(queries):
+        _, found[i : i + 1] = index.search(query[None, :], args.k, params=params)
+    elapsed = time.perf_counter() - start
+    return {"recall": recall_at_k(found, truth), "qps": len(queries) / elapsed,
+            "latency_ms": 1000 * elapsed / len(queries)}
+
+
+# 3. Run
+faiss.omp_set_num_threads(1)  # single-query latency, comparable across machines
+results = []
+for n in [int(s) for s in args.sizes.split(",")]:
+    corpus, queries = make_corpus(n, args.dim)
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print("=" * 72)
+    print(f"n={n:,}  dim={args.dim}  k={args.k}  target recall={args.target_recall}  "
+          f"auto choice: {choose_index(n, args.target_recall)}")
+    print("=" * 72)
+    print(f"{'index':<8}{'build s':>9}{'knob':>16}{'recall@k':>10}{'QPS':>10}{'ms/query':>10}")
+
+    for kind in ["flat", "hnsw", "ivf"]:
+        start = time.perf_counter()
+        index, report = build_index(corpus, args.target_recall, kind=kind, k=args.k)
+        build = time.perf_counter() - start
+        knob = "-"
+        if "ef_search" in report:
+            knob = f"efSearch={report['ef_search']}"
+        elif "nprobe" in report:
+            knob = f"nprobe={report['nprobe']}/{index.nlist}"
+        row = {"n": n, "index": kind, "build_s": build, "knob": knob, **measure(index, queries, truth)}
+        results.append(row)
+        print(f"{kind:<8}{build:>9.2f}{knob:>16}{row['recall']:>10.3f}{row['qps']:>10.0f}{row['latency_ms']:>10.3f}")
+
+        # Show the knob's effect: half and double the tuned value
+        for name in ("ef_search", "nprobe"):
+            if name in report:
+                for value in (max(1, report[name] // 2), report[name] * 2):
+                    r = measure(index, queries, truth, search_params(index, **{name: value}))
+                    print(f"{'':<8}{'':>9}{f'{name}={value}':>16}{r['recall']:>10.3f}{r['qps']:>10.0f}"
+                          f"{r['latency_ms']:>10.3f}")
+    print()
+
+print("Tuned knobs are only defaults: ANNRetriever(nprobe=..., ef_search=...) overrides them per retriever.")
+
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.json}")
@@ -0,0 +1,253 @@
+"""A deterministic, OpenAI-compatible stand-in server for benchmarks and tests.
+
+Import from a script in this folder, e.g. `from fake_llm_server import FakeLLMServer`,
+or run it on its own:
+
+    python 08_performance/fake_llm_server.py --port 8001
+
+It implements just enough of the API for ChatOpenAI and OpenAIEmbeddings:
+
+- GET  /v1/models             model list, with ETag / If-None-Match support
+- POST /v1/chat/completions   plain and streaming (SSE) responses
+- POST /v1/embeddings         bag-of-words vectors, so similar texts are close
+
+Latency is scripted per model, so results are repeatable:
+
+    FakeLLMServer(models={
+        "fast-model": {"ttft": 0.05, "inter_token": 0.005},
+        "flaky-model": {"ttft": 0.05, "stall_every": 10, "stall_seconds": 2.0},
+        "down-model": {"status": 503},
+    })
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PROFILE = {
+    "ttft": 0.05,          # seconds before the first token
+    "inter_token": 0.01,   # seconds between tokens
+    "tokens": 60,          # tokens per response
+    "stall_every": 0,      # every Nth request stalls (0 = never)
+    "stall_seconds": 0.0,  # extra delay before the first token of a stalled request
+    "status": 200,         # set to e.g. 503 to simulate an unhealthy model
+}
+
+EMBEDDING_DIMENSIONS = 256
+
+_WORDS = ("LangChain streams tokens through LCEL so every stage can start work "
+          "before the model has finished its answer and the user sees text early").split()
+
+
+def embed_text(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> list[float]:
+    """Hash each word into a bucket and L2-normalize: cheap and deterministic."""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        bucket = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "big") % dimensions
+        vector[bucket] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeLLM/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers=None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            body = {"object": "list", "data": [
+                {"id": name, "object": "model", "owned_by": "fake"} for name in self.server.models
+            ]}
+            etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._send_json(200, body, {"ETag": etag})
+            return
+        self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            self._chat(request)
+        elif self.path.endswith("/embeddings"):
+            inputs = request.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            data = [{"object": "embedding", "index": i, "embedding": embed_text(str(text))}
+                    for i, text in enumerate(inputs)]
+            self._send_json(200, {"object": "list", "data": data, "model": request.get("model", ""),
+                                  "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def _chat(self, request: dict) -> None:
+        model = request.get("model", "")
+        profile = self.server.profile(model)
+        if profile["status"] != 200:
+            self._send_json(profile["status"], {"error": {"message": f"{model} is unavailable"}})
+            return
+
+        n = self.server.next_request_number(model)
+        delay = profile["ttft"]
+        if profile["stall_every"] and n % profile["stall_every"] == 0:
+            delay += profile["stall_seconds"]
+
+        tokens = [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(profile["tokens"])]
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        base = {"id": f"chatcmpl-{n}", "created": int(time.time()), "model": model}
+
+        if not request.get("stream"):
+            time.sleep(delay + profile["inter_token"] * max(len(tokens) - 1, 0))
+            try:
+                self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                }]})
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(payload) -> None:
+            self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        chunk = {**base, "object": "chat.completion.chunk"}
+        try:
+            time.sleep(delay)
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(profile["inter_token"])
+                delta = {"content": token}
+                if i == 0:
+                    delta["role"] = "assistant"
+                event({**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event({**chunk, "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled (e.g. a hedged request that lost the race)
+            pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, models):
+        super().__init__(address, _Handler)
+        self.models = {name: {**DEFAULT_PROFILE, **(profile or {})} for name, profile in models.items()}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def profile(self, model: str) -> dict:
+        return self.models.get(model, DEFAULT_PROFILE)
+
+    def next_request_number(self, model: str) -> int:
+        with self._lock:
+            self._counts[model] = self._counts.get(model, 0) + 1
+            return self._counts[model]
+
+
+class FakeLLMServer:
+    """Runs the stand-in server in a background thread or a separate process.
+
+    Use `in_process=False` for benchmarks, so the server's own CPU time does
+    not show up in the client's measurements.
+    """
+
+    def __init__(self, models=None, host: str = "127.0.0.1", port: int = 0, in_process: bool = True):
+        self.models = models or {"fake-model": {}}
+        self.host = host
+        self.port = port
+        self.in_process = in_process
+        self._server = None
+        self._process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        if self.in_process:
+            self._server = _Server((self.host, self.port), self.models)
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        else:
+            # A fresh interpreter (not multiprocessing) so the calling script's
+            # top-level code is never re-run in the child
+            self._process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--host", self.host,
+                 "--port", str(self.port), "--models", json.dumps(self.models)],
+                stdout=subprocess.PIPE, text=True,
+            )
+            # The first line is "Fake OpenAI API at http://host:port/v1 ..."
+            line = self._process.stdout.readline()
+            self.port = int(re.search(r":(\d+)/v1", line).group(1))
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI-compatible server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", type=float, default=DEFAULT_PROFILE["ttft"])
+    parser.add_argument("--inter-token", type=float, default=DEFAULT_PROFILE["inter_token"])
+    parser.add_argument("--tokens", type=int, default=DEFAULT_PROFILE["tokens"])
+    parser.add_argument("--models", help='JSON {model: profile}; overrides the three options above')
+    args = parser.parse_args()
+
+    if args.models:
+        models = json.loads(args.models)
+    else:
+        models = {"fake-model": {"ttft": args.ttft, "inter_token": args.inter_token, "tokens": args.tokens}}
+    server = _Server((args.host, args.port), models)
+    port = server.server_address[1]
+    print(f"Fake OpenAI API at http://{args.host}:{port}/v1 (models: {', '.join(models)})", flush=True)
+    server.serve_forever()
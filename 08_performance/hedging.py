@@ -0,0 +1,181 @@
+"""Hedged requests: cut tail latency by racing a backup request against a slow one.
+
+Import from a script in this folder, e.g. `from hedging import HedgedChatModel`.
+
+    llm = HedgedChatModel(primary=ChatOpenAI(...), backup=ChatOpenAI(...))
+    chain = prompt | llm | StrOutputParser()
+
+If the primary has not produced its first token by the time it is slower
+than usual (an adaptive p95 of recent first-token latencies), a backup
+request goes out. Whichever produces a first token first wins; the other
+is cancelled, which closes its HTTP stream. A budget caps how many
+requests may be hedged, so a struggling provider doesn't receive double load.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Any
+from langchain_core.language_models.chat_models import (
+    BaseChatModel,
+    agenerate_from_stream,
+    generate_from_stream,
+)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """One event loop in a daemon thread, used to run hedging from sync code."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True, name="hedging-loop").start()
+        return _loop
+
+
+async def _discard(task: asyncio.Task, stream) -> None:
+    """Cancel a losing request and close its stream (and so its connection)."""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    try:
+        await stream.aclose()
+    except Exception:
+        pass
+
+
+class HedgedChatModel(BaseChatModel):
+    """Wraps a chat model and hedges requests whose first token is late."""
+
+    primary: Any
+    backup: Any = None               # defaults to the primary model itself
+    percentile: float = 0.95         # hedge once slower than this share of recent requests
+    window: int = 200                # recent first-token latencies to keep
+    min_samples: int = 20            # until then, use initial_delay
+    initial_delay: float = 1.0       # seconds
+    min_delay: float = 0.02          # never hedge sooner than this
+    max_hedge_ratio: float = 0.1     # at most ~10% of requests send a backup
+    burst: int = 2                   # extra hedges allowed before the ratio applies
+
+    requests: int = 0
+    hedges: int = 0
+    backup_wins: int = 0
+    _samples: Any = None
+    _lock: Any = None
+
+    def model_post_init(self, __context) -> None:
+        self._samples = deque(maxlen=self.window)
+        self._lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    # --- policy -----------------------------------------------------------
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary's first token before sending the backup."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges < self.max_hedge_ratio * self.requests + self.burst:
+                self.hedges += 1
+                return True
+            return False
+
+    def _observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    # --- hedged streaming -------------------------------------------------
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._lock:
+            self.requests += 1
+        backup_model = self.backup or self.primary
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        # run_manager stays with this wrapper so callbacks fire once per token
+        primary = self.primary._astream(messages, stop=stop, **kwargs)
+        racers = {asyncio.ensure_future(primary.__anext__()): ("primary", primary)}
+        hedged = False
+
+        done, _ = await asyncio.wait(set(racers), timeout=self.hedge_delay())
+        primary_failed = any(t.exception() is not None and not isinstance(t.exception(), StopAsyncIteration)
+                             for t in done)
+        # Hedge when the primary is late, or fail over at once when it errored
+        if (not done and self._take_budget()) or primary_failed:
+            hedged = True
+            backup = backup_model._astream(messages, stop=stop, **kwargs)
+            racers[asyncio.ensure_future(backup.__anext__())] = ("backup", backup)
+
+        winner = None
+        errors = []
+        pending = set(racers)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None or isinstance(error, StopAsyncIteration):
+                    winner = task
+                    break
+                errors.append(error)
+
+        elapsed = loop.time() - start
+        for task, (label, stream) in racers.items():
+            if task is not winner:
+                if label == "primary" and not task.done():
+                    # The primary was at least this slow; keep the estimate honest
+                    self._observe(elapsed)
+                await _discard(task, stream)
+
+        if winner is None:
+            raise errors[0]
+        label, stream = racers[winner]
+        if label == "primary":
+            self._observe(elapsed)
+        elif hedged:
+            with self._lock:
+                self.backup_wins += 1
+
+        if isinstance(winner.exception(), StopAsyncIteration):
+            return
+        yield winner.result()
+        async for chunk in stream:
+            yield chunk
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await agenerate_from_stream(self._astream(messages, stop=stop, **kwargs))
+
+    # --- sync entry points run the async race on a background loop -------
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        loop = _background_loop()
+        stream = self._astream(messages, stop=stop, **kwargs)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return generate_from_stream(self._stream(messages, stop=stop, **kwargs))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "backup_wins": self.backup_wins,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+        }
@@ -0,0 +1,272 @@
+"""Aggregate per-stage metrics for chains, exposed in Prometheus text format.
+
+Import from a script in this folder, e.g. `from metrics import MetricsCallbackHandler`.
+
+    metrics = MetricsCallbackHandler()
+    chain.invoke(inputs, config={"callbacks": [metrics]})
+    metrics.serve(port=8000)                 # GET http://localhost:8000/metrics
+    metrics.write_textfile("metrics.prom")   # or for node_exporter's textfile collector
+
+Everything is kept in constant memory per stage: latencies go into fixed
+histogram buckets (p50/p90/p99 are estimated from them), and throughput
+is counted in a 60-slot ring of one-second buckets.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Bucket upper bounds in seconds: 1ms .. ~2min, growing by 1.25x
+BUCKETS = tuple(round(0.001 * 1.25 ** i, 6) for i in range(53))
+QUANTILES = (0.5, 0.9, 0.99)
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram: O(1) memory no matter how many observations."""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        # A plain scan; most observations land in the first few dozen buckets
+        i = 0
+        for bound in self.bounds:
+            if seconds <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that contains it."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if cumulative + n >= target and n:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (target - cumulative) / n
+            cumulative += n
+        return self.bounds[-1]
+
+
+class StageStats:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._ring_counts = [0] * THROUGHPUT_WINDOW_SECONDS
+        self._ring_seconds = [0] * THROUGHPUT_WINDOW_SECONDS
+
+    def tick(self, now: float) -> None:
+        second = int(now)
+        slot = second % THROUGHPUT_WINDOW_SECONDS
+        if self._ring_seconds[slot] != second:
+            self._ring_seconds[slot] = second
+            self._ring_counts[slot] = 0
+        self._ring_counts[slot] += 1
+
+    def throughput(self, now: float) -> float:
+        """Completed runs per second over the last minute."""
+        oldest = int(now) - THROUGHPUT_WINDOW_SECONDS
+        done = sum(n for n, s in zip(self._ring_counts, self._ring_seconds) if s > oldest)
+        return done / THROUGHPUT_WINDOW_SECONDS
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Latency histograms, throughput, errors and in-flight runs per runnable name."""
+
+    run_inline = True
+
+    def __init__(self, prefix: str = "langchain"):
+        self.prefix = prefix
+        self.stages = {}
+        self.cache_hits = {}
+        self.cache_misses = {}
+        self._open = {}
+        self._lock = threading.Lock()
+
+    # --- recording --------------------------------------------------------
+
+    def _start(self, kind: str, serialized, run_id, kwargs) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or kind
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(kind)
+            stats.in_flight += 1
+        self._open[run_id] = (stats, time.perf_counter())
+
+    def _end(self, run_id, error: bool = False) -> None:
+        entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        stats, started = entry
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats.in_flight -= 1
+            stats.requests += 1
+            stats.errors += error
+            stats.latency.observe(elapsed)
+            stats.tick(time.time())
+
+    def observe_cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            counter = self.cache_hits if hit else self.cache_misses
+            counter[name] = counter.get(name, 0) + 1
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        self._start("chain", serialized, run_id, kwargs)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start("llm", serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start("llm", serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start("tool", serialized, run_id, kwargs)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start("retriever", serialized, run_id, kwargs)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    # --- exposition -------------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        p = self.prefix
+        now = time.time()
+        out = [
+            f"# HELP {p}_stage_latency_seconds Run latency per runnable.",
+            f"# TYPE {p}_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for name, s in stages:
+                labels = f'stage="{_label(name)}",kind="{s.kind}"'
+                cumulative = 0
+                for bound, n in zip(s.latency.bounds, s.latency.counts):
+                    cumulative += n
+                    out.append(f'{p}_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f'{p}_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {s.latency.count}')
+                out.append(f"{p}_stage_latency_seconds_sum{{{labels}}} {s.latency.sum:.6f}")
+                out.append(f"{p}_stage_latency_seconds_count{{{labels}}} {s.latency.count}")
+
+            out += [f"# HELP {p}_stage_latency_quantile_seconds Estimated latency quantiles.",
+                    f"# TYPE {p}_stage_latency_quantile_seconds gauge"]
+            for name, s in stages:
+                for q in QUANTILES:
+                    out.append(f'{p}_stage_latency_quantile_seconds{{stage="{_label(name)}",quantile="{q}"}} '
+                               f"{s.latency.quantile(q):.6f}")
+
+            for metric, kind, help_text, value in (
+                ("stage_runs_total", "counter", "Completed runs.", lambda s: s.requests),
+                ("stage_errors_total", "counter", "Runs that raised.", lambda s: s.errors),
+                ("stage_in_flight", "gauge", "Runs currently in progress.", lambda s: s.in_flight),
+                ("stage_throughput_per_second", "gauge", "Completed runs/s over the last minute.",
+                 lambda s: round(s.throughput(now), 4)),
+            ):
+                out += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} {kind}"]
+                for name, s in stages:
+                    out.append(f'{p}_{metric}{{stage="{_label(name)}"}} {value(s)}')
+
+            caches = sorted(set(self.cache_hits) | set(self.cache_misses))
+            out += [f"# HELP {p}_cache_lookups_total Cache lookups by result.",
+                    f"# TYPE {p}_cache_lookups_total counter"]
+            for name in caches:
+                out.append(f'{p}_cache_lookups_total{{cache="{_label(name)}",result="hit"}} {self.cache_hits.get(name, 0)}')
+                out.append(f'{p}_cache_lookups_total{{cache="{_label(name)}",result="miss"}} {self.cache_misses.get(name, 0)}')
+            out += [f"# HELP {p}_cache_hit_ratio Hits / lookups.",
+                    f"# TYPE {p}_cache_hit_ratio gauge"]
+            for name in caches:
+                hits, misses = self.cache_hits.get(name, 0), self.cache_misses.get(name, 0)
+                out.append(f'{p}_cache_hit_ratio{{cache="{_label(name)}"}} {hits / (hits + misses):.4f}')
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write atomically, so a scraper never reads a half-written file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port: int = 8000, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve GET /metrics from a daemon thread. Returns the server (call .shutdown() to stop)."""
+        handler = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = handler.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class MeteredCache(BaseCache):
+    """Wraps an LLM cache (e.g. InMemoryCache) and reports hits/misses to the metrics."""
+
+    def __init__(self, inner: BaseCache, metrics: MetricsCallbackHandler, name: str = "llm"):
+        self.inner = inner
+        self.metrics = metrics
+        self.name = name
+
+    def lookup(self, prompt, llm_string):
+        value = self.inner.lookup(prompt, llm_string)
+        self.metrics.observe_cache(self.name, value is not None)
+        return value
+
+    def update(self, prompt, llm_string, return_val):
+        self.inner.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs):
+        self.inner.clear(**kwargs)
@@ -0,0 +1,286 @@
+"""Model catalog with an on-disk cache, latency probes and fastest-model routing.
+
+Import from a script in this folder, e.g. `from model_catalog import ModelCatalog, ModelRouter`.
+
+    catalog = ModelCatalog(base_url)              # /models, cached on disk
+    router = ModelRouter(base_url, pool=["model-a:free", "model-b:free"])
+    router.probe_all()                            # measure TTFT / throughput now
+    router.start(interval=300)                    # ...and keep re-probing in the background
+    llm = router.chat_model(temperature=0)        # drop-in chat model for any chain
+
+Every request from `llm` goes to the fastest healthy model in the pool and
+fails over to the next one if that model errors.
+"""
+import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import requests
+from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
+
+
+class ModelCatalog:
+    """The provider's /models list, cached on disk and refreshed conditionally.
+
+    A cache younger than `max_age` seconds is used as is. An older one is
+    revalidated with If-None-Match / If-Modified-Since, so an unchanged list
+    costs a 304 instead of the full download. If the provider cannot be
+    reached, the stale cache is still returned.
+    """
+
+    def __init__(self, base_url: str, api_key: str = None, cache_path: str = ".cache/models.json",
+                 max_age: float = 3600):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.cache_path = cache_path
+        self.max_age = max_age
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, cache: dict) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, self.cache_path)
+
+    def list_models(self, force: bool = False) -> list[dict]:
+        cache = self._read_cache()
+        if cache and not force and time.time() - cache["fetched_at"] < self.max_age:
+            return cache["models"]
+
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        if cache and cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache and cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+        try:
+            response = requests.get(f"{self.base_url}/models", headers=headers, timeout=10)
+        except requests.RequestException:
+            if cache:
+                return cache["models"]
+            raise
+
+        if response.status_code == 304 and cache:
+            cache["fetched_at"] = time.time()
+            self._write_cache(cache)
+            return cache["models"]
+        if response.status_code != 200:
+            if cache:
+                return cache["models"]
+            raise RuntimeError(f"Failed to fetch models: {response.status_code}")
+
+        cache = {
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "models": response.json().get("data", []),
+        }
+        self._write_cache(cache)
+        return cache["models"]
+
+    def model_ids(self, suffix: str = "") -> list[str]:
+        return [m["id"] for m in self.list_models() if m["id"].endswith(suffix)]
+
+
+class ModelHealth:
+    def __init__(self, model: str):
+        self.model = model
+        self.ttft = None          # seconds, exponentially weighted
+        self.tokens_per_s = None  # chunks per second after the first one
+        self.healthy = True
+        self.failures = 0
+        self.last_probe = 0.0
+        self.last_error = None
+
+    def observe(self, ttft: float, tokens_per_s: float = None, weight: float = 0.3) -> None:
+        self.ttft = ttft if self.ttft is None else (1 - weight) * self.ttft + weight * ttft
+        if tokens_per_s:
+            self.tokens_per_s = (tokens_per_s if self.tokens_per_s is None
+                                 else (1 - weight) * self.tokens_per_s + weight * tokens_per_s)
+        self.healthy = True
+        self.failures = 0
+
+    def expected_latency(self, tokens: int) -> float:
+        """Estimated seconds to produce `tokens` tokens; unprobed models sort last."""
+        if self.ttft is None:
+            return float("inf")
+        rate = self.tokens_per_s or 1.0
+        return self.ttft + tokens / rate
+
+
+class ModelRouter:
+    """Ranks a pool of models by measured latency and hands out a routed chat model.
+
+    A model is marked unhealthy after `max_failures` consecutive errors (from
+    probes or real requests) and is skipped until a later probe succeeds.
+    """
+
+    def __init__(self, base_url: str, pool: list[str], api_key: str = None,
+                 expected_tokens: int = 200, max_failures: int = 2,
+                 probe_prompt: str = "Reply with the single word OK.", probe_timeout: float = 30):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.pool = list(pool)
+        self.expected_tokens = expected_tokens
+        self.max_failures = max_failures
+        self.probe_prompt = probe_prompt
+        self.probe_timeout = probe_timeout
+        self.health = {model: ModelHealth(model) for model in self.pool}
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def client(self, model: str, **kwargs) -> ChatOpenAI:
+        # Serialised rather than hashed, so dict values (model_kwargs, headers) work as keys
+        key = (model, json.dumps(kwargs, sort_keys=True, default=repr))
+        with self._lock:
+            if key not in self._clients:
+                extra = {"api_key": self.api_key} if self.api_key else {}
+                self._clients[key] = ChatOpenAI(
+                    model=model, base_url=self.base_url, max_retries=0,
+                    timeout=self.probe_timeout, **extra, **kwargs
+                )
+            return self._clients[key]
+
+    # --- health -----------------------------------------------------------
+
+    def record_success(self, model: str, ttft: float, tokens_per_s: float = None) -> None:
+        with self._lock:
+            self.health[model].observe(ttft, tokens_per_s)
+
+    def record_ok(self, model: str) -> None:
+        """A request succeeded but gave no latency sample (e.g. a non-streamed call)."""
+        with self._lock:
+            self.health[model].healthy = True
+            self.health[model].failures = 0
+
+    def record_failure(self, model: str, error: Exception) -> None:
+        with self._lock:
+            health = self.health[model]
+            health.failures += 1
+            health.last_error = f"{type(error).__name__}: {error}"
+            if health.failures >= self.max_failures:
+                health.healthy = False
+
+    def probe(self, model: str) -> None:
+        """Stream a tiny completion and record TTFT and throughput."""
+        # Build the client first so its one-off setup is not timed as latency
+        llm = self.client(model, temperature=0)
+        start = time.perf_counter()
+        first = None
+        chunks = 0
+        try:
+            for chunk in llm.stream(self.probe_prompt):
+                if chunk.content:
+                    chunks += 1
+                    if first is None:
+                        first = time.perf_counter()
+        except Exception as e:
+            # A failed probe counts fully: the model is out until it recovers
+            for _ in range(self.max_failures):
+                self.record_failure(model, e)
+        else:
+            end = time.perf_counter()
+            ttft = (first or end) - start
+            tokens_per_s = (chunks - 1) / (end - first) if chunks > 1 and end > first else None
+            self.record_success(model, ttft, tokens_per_s)
+        finally:
+            self.health[model].last_probe = time.time()
+
+    def probe_all(self) -> None:
+        with ThreadPoolExecutor(max_workers=min(8, len(self.pool) or 1)) as pool:
+            list(pool.map(self.probe, self.pool))
+
+    def start(self, interval: float = 300) -> None:
+        """Re-probe the pool every `interval` seconds in a daemon thread."""
+        def loop():
+            while not self._stop.wait(interval):
+                self.probe_all()
+        threading.Thread(target=loop, daemon=True, name="model-prober").start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def ranked(self) -> list[str]:
+        """Healthy models, fastest first; unhealthy ones are kept at the end as a last resort."""
+        with self._lock:
+            healths = list(self.health.values())
+        order = sorted(healths, key=lambda h: (not h.healthy, h.expected_latency(self.expected_tokens)))
+        return [h.model for h in order]
+
+    def chat_model(self, **kwargs) -> "RoutedChatModel":
+        return RoutedChatModel(router=self, model_kwargs=kwargs)
+
+
+class RoutedChatModel(BaseChatModel):
+    """A chat model that sends each request to the router's current fastest model.
+
+    If that model errors before producing output, the request is retried on
+    the next model in the ranking. Streamed requests also feed their TTFT
+    back into the router, so ranking keeps up between probes.
+    """
+
+    router: Any
+    model_kwargs: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat-model"
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools the way ChatOpenAI does; they are forwarded to whichever model serves the request."""
+        models = self.router.ranked()
+        if not models:
+            raise RuntimeError("model pool is empty")
+        # Every model in the pool speaks the same API, so any client can format the tool schemas
+        formatted = self.router.client(models[0], **self.model_kwargs).bind_tools(tools, **kwargs)
+        return self.bind(**formatted.kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        last_error = None
+        for model in self.router.ranked():
+            try:
+                # run_manager stays with this wrapper so callbacks fire once, not twice
+                result = self.router.client(model, **self.model_kwargs)._generate(
+                    messages, stop=stop, **kwargs
+                )
+                self.router.record_ok(model)
+                return result
+            except Exception as e:
+                self.router.record_failure(model, e)
+                last_error = e
+        raise last_error or RuntimeError("model pool is empty")
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        last_error = None
+        for model in self.router.ranked():
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in self.router.client(model, **self.model_kwargs)._stream(
+                    messages, stop=stop, **kwargs
+                ):
+                    if not started:
+                        started = True
+                        self.router.record_success(model, time.perf_counter() - start)
+                    yield chunk
+                return
+            except Exception as e:
+                self.router.record_failure(model, e)
+                if started:
+                    # Output already reached the caller; switching models now would garble it
+                    raise
+                last_error = e
+        raise last_error or RuntimeError("model pool is empty")
@@ -0,0 +1,205 @@
+"""Callback-based tracer that records a span for every runnable.
+
+Import from a script in this folder, e.g. `from tracing import TraceRecorder`
+(scripts are run from the repo root, e.g. `python 08_performance/01_tracing.py`,
+so this folder is on sys.path).
+
+Pass the recorder as a callback and every step of a chain or agent (prompt,
+model, parser, retriever, tool, AgentExecutor iteration) becomes one span:
+
+    tracer = TraceRecorder()
+    chain.invoke(inputs, config={"callbacks": [tracer]})
+    tracer.export_chrome_trace("traces/trace.json")   # open in chrome://tracing or Perfetto
+    tracer.export_jsonl("traces/spans.jsonl")
+"""
+import os
+import json
+import threading
+import time
+from collections import deque
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+def _name(serialized, kwargs, default: str) -> str:
+    if kwargs.get("name"):
+        return kwargs["name"]
+    if serialized:
+        if serialized.get("name"):
+            return serialized["name"]
+        if serialized.get("id"):
+            return serialized["id"][-1]
+    return default
+
+
+def _token_usage(response) -> dict:
+    """Token usage from an LLMResult, whichever way the provider reported it."""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return {
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                }
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+    return {}
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Records start/end times, token usage and TTFT for every run.
+
+    Kept cheap enough to leave on: each callback is a perf_counter_ns() read
+    and a dict update, nothing is formatted until export, and finished spans
+    go into a bounded deque (`max_spans`) so memory stays flat.
+    """
+
+    # Run sync callbacks inline even inside async chains (no executor hop)
+    run_inline = True
+
+    def __init__(self, max_spans: int = 100_000):
+        self.spans = deque(maxlen=max_spans)
+        self._open = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    # --- span bookkeeping -------------------------------------------------
+
+    def _start(self, kind: str, name: str, run_id, parent_run_id, **extra) -> None:
+        self._open[run_id] = {
+            "name": name,
+            "kind": kind,
+            "run_id": str(run_id),
+            "parent_run_id": str(parent_run_id) if parent_run_id else None,
+            "thread_id": threading.get_ident(),
+            "start_ns": time.perf_counter_ns(),
+            **extra,
+        }
+
+    def _end(self, run_id, error=None, **extra) -> None:
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span["end_ns"] = time.perf_counter_ns()
+        span["duration_ms"] = (span["end_ns"] - span["start_ns"]) / 1e6
+        if error is not None:
+            span["error"] = f"{type(error).__name__}: {error}"
+        span.update(extra)
+        with self._lock:
+            self.spans.append(span)
+
+    # --- chains (prompt, parser, RunnableSequence, AgentExecutor, ...) ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start("chain", _name(serialized, kwargs, "chain"), run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # --- models -----------------------------------------------------------
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", _name(serialized, kwargs, "chat_model"), run_id, parent_run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", _name(serialized, kwargs, "llm"), run_id, parent_run_id)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._open.get(run_id)
+        if span is not None and "first_token_ns" not in span:
+            span["first_token_ns"] = time.perf_counter_ns()
+            span["ttft_ms"] = (span["first_token_ns"] - span["start_ns"]) / 1e6
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # --- tools and retrievers ---------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start("tool", _name(serialized, kwargs, "tool"), run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start("retriever", _name(serialized, kwargs, "retriever"), run_id, parent_run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # --- export -----------------------------------------------------------
+
+    def finished_spans(self) -> list[dict]:
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s["start_ns"])
+
+    def export_jsonl(self, path: str) -> None:
+        """One JSON object per span, for grep/jq/pandas."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.finished_spans():
+                f.write(json.dumps(span, ensure_ascii=False) + "\n")
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Chrome trace-event JSON (open in chrome://tracing or ui.perfetto.dev)."""
+        events = []
+        for span in self.finished_spans():
+            args = {k: v for k, v in span.items()
+                    if k not in ("name", "kind", "start_ns", "end_ns", "thread_id")}
+            events.append({
+                "name": span["name"],
+                "cat": span["kind"],
+                "ph": "X",
+                "ts": span["start_ns"] / 1000,
+                "dur": (span["end_ns"] - span["start_ns"]) / 1000,
+                "pid": self._pid,
+                "tid": span["thread_id"],
+                "args": args,
+            })
+            if "first_token_ns" in span:
+                events.append({
+                    "name": "first token",
+                    "cat": span["kind"],
+                    "ph": "i",
+                    "s": "t",
+                    "ts": span["first_token_ns"] / 1000,
+                    "pid": self._pid,
+                    "tid": span["thread_id"],
+                })
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self) -> str:
+        """A plain-text table of spans, indented by nesting depth."""
+        spans = self.finished_spans()
+        depth = {}
+        lines = [f"{'span':<40} {'kind':<10} {'ms':>9} {'ttft ms':>9} {'tokens':>7}"]
+        for span in spans:
+            level = depth.get(span["parent_run_id"], -1) + 1
+            depth[span["run_id"]] = level
+            name = ("  " * level + span["name"])[:40]
+            ttft = f"{span['ttft_ms']:.1f}" if "ttft_ms" in span else "-"
+            tokens = span.get("total_tokens", "-")
+            flag = "  ERROR" if "error" in span else ""
+            lines.append(f"{name:<40} {span['kind']:<10} {span['duration_ms']:>9.1f} {ttft:>9} {tokens:>7}{flag}")
+        return "\n".join(lines)
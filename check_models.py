@@ -1,12 +1,23 @@
-import requests
 import os
+import sys
 from dotenv import load_dotenv
 
+# The catalog lives in 08_performance; make it importable from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "08_performance"))
+from model_catalog import ModelCatalog
+
 load_dotenv()
 
-response = requests.get("https://openrouter.ai/api/v1/models")
-if response.status_code == 200:
-    models = response.json().get('data', [])
+# The model list is cached in .cache/models.json and only re-downloaded when
+# it is older than an hour and the server says it changed (ETag / 304).
+# Pass --refresh to revalidate now.
+catalog = ModelCatalog("https://openrouter.ai/api/v1", cache_path=os.path.join(".cache", "models.json"))
+
+try:
+    models = catalog.list_models(force="--refresh" in sys.argv)
+except Exception as e:
+    print(f"Failed to fetch models: {e}")
+else:
     print("--- Available FREE Models on OpenRouter ---")
     count = 0
     for m in models:
@@ -19,5 +30,4 @@ if response.status_code == 200:
         # Fallback print some popular ones
         for m in models[:10]:
              print(f"- {m['id']}")
-else:
-    print(f"Failed to fetch models: {response.status_code}")
+    print("\nTip: put several of these in MODEL_POOL and run 08_performance/04_model_routing.py --live")